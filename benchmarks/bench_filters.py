@@ -0,0 +1,32 @@
+"""pytest-benchmark suite over the same cases as ``afterglow bench``.
+
+Not collected by a plain ``pytest`` run (the file name doesn't match
+``test_*``); run it explicitly:
+
+    pytest benchmarks/bench_filters.py --benchmark-json=out.json
+
+Sizes default to 0.5 and 2 MP; set ``AFTERGLOW_BENCH_SIZES=0.5,2,12,48``
+for the full sweep. Compare runs with ``--benchmark-compare``.
+"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from afterglow.bench import chain_cases, filter_cases, synthetic_image
+
+SIZES = [float(s) for s in os.environ.get("AFTERGLOW_BENCH_SIZES", "0.5,2").split(",") if s]
+CASES = {**filter_cases(), **chain_cases()}
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda mp: f"{mp:g}MP")
+def image(request):
+    return synthetic_image(request.param)
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_filter(benchmark, image, name):
+    benchmark.extra_info["megapixels"] = image.width * image.height / 1e6
+    benchmark(CASES[name], image)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from afterglow.filters.mapcache import configure_map_cache
+from afterglow.io import ARRAY_SUFFIXES, write_array
+from afterglow.pipeline import StepSpec, build_steps, read_input, run_array
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+
+# times a job is resubmitted after its worker pool broke (e.g. a worker was
+# killed for memory); the job that killed it can't be told apart from the
+# others that were in flight
+_RETRIES = 1
+
+
+@dataclass
+class BatchResult:
+    source: Path
+    output: Path
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def collect_inputs(pattern: str) -> List[Path]:
+    """Expand a directory or glob pattern into a sorted list of image paths."""
+    root = Path(pattern)
+    if root.is_dir():
+        candidates = list(root.iterdir())
+    else:
+        candidates = [Path(p) for p in glob.glob(pattern, recursive=True)]
+    suffixes = IMAGE_SUFFIXES | ARRAY_SUFFIXES
+    return sorted(p for p in candidates if p.is_file() and p.suffix.lower() in suffixes)
+
+
+def input_root(pattern: str) -> Path:
+    """The directory a directory or glob pattern matches below, e.g. ``photos`` for ``photos/**/*.jpg``."""
+    root = Path(pattern)
+    if root.is_dir():
+        return root
+    parts = []
+    for part in root.parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    else:
+        # a plain file path
+        parts = parts[:-1]
+    return Path(*parts) if parts else Path(".")
+
+
+def output_paths(
+    inputs: Sequence[Path], out_dir: Path, suffix: Optional[str] = None, root: Optional[Path] = None
+) -> List[Path]:
+    """Where each input's result goes; raises ValueError when two would share a path.
+
+    - suffix: output extension such as ``.png`` (defaults to the input's)
+    - root: outputs mirror each input's path relative to this directory
+      (default: all directly in ``out_dir``)
+    """
+    outputs = []
+    seen: Dict[Path, Path] = {}
+    for source in inputs:
+        ext = suffix if suffix is not None else source.suffix
+        if ext and not ext.startswith("."):
+            ext = "." + ext
+        relative = Path(os.path.relpath(source, root)) if root is not None else Path(source.name)
+        output = out_dir / relative.with_suffix(ext)
+        if output in seen:
+            raise ValueError(f"{seen[output]} and {source} would both be written to {output}")
+        seen[output] = source
+        outputs.append(output)
+    return outputs
+
+
+def _process_one(
+    source: Path, output: Path, specs: Sequence[StepSpec], max_memory: Optional[int] = None
+) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        arr, steps = read_input(source, build_steps(specs))
+        write_array(run_array(arr, steps, max_memory=max_memory), output)
+    except Exception as exc:  # report and keep the batch going
+        return BatchResult(source, output, time.perf_counter() - start, f"{type(exc).__name__}: {exc}")
+    return BatchResult(source, output, time.perf_counter() - start)
+
+
+def run_batch(
+    inputs: Sequence[Path],
+    out_dir: Path,
+    specs: Sequence[StepSpec],
+    workers: Optional[int] = None,
+    suffix: Optional[str] = None,
+    max_memory: Optional[int] = None,
+    map_cache: Optional[Path] = None,
+    root: Optional[Path] = None,
+) -> Iterator[BatchResult]:
+    """Process images over a process pool, yielding results as they finish.
+
+    A worker that dies (e.g. killed for memory) fails the jobs in flight
+    with it; they are retried once on a fresh pool, then reported failed.
+
+    - specs: chain step specs, e.g. ``["halftone:cell=8", "glow"]``
+    - workers: pool size (defaults to the CPU count)
+    - suffix: output extension such as ``.png`` (defaults to the input's)
+    - max_memory: per-step working-set budget passed to each worker
+    - map_cache: directory where workers share cached coordinate maps
+    - root: see :func:`output_paths`
+    """
+    # fail fast on bad specs and clashing outputs before spinning up workers
+    build_steps(specs)
+    jobs = list(zip(inputs, output_paths(inputs, out_dir, suffix, root)))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        if map_cache is not None:
+            configure_map_cache(directory=map_cache)
+        for source, output in jobs:
+            yield _process_one(source, output, specs, max_memory)
+        return
+
+    init_args = (None, map_cache) if map_cache is not None else ()
+    initializer = configure_map_cache if map_cache is not None else None
+    for attempt in range(_RETRIES + 1):
+        retry = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=init_args) as pool:
+            futures = {
+                pool.submit(_process_one, source, output, list(specs), max_memory): (source, output)
+                for source, output in jobs
+            }
+            for future in as_completed(futures):
+                source, output = futures[future]
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    if attempt < _RETRIES:
+                        retry.append((source, output))
+                    else:
+                        yield BatchResult(source, output, 0.0, "Worker process died")
+                except Exception as exc:  # e.g. the result couldn't be sent back
+                    yield BatchResult(source, output, 0.0, f"{type(exc).__name__}: {exc}")
+        if not retry:
+            return
+        jobs = retry
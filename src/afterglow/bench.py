@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy
+from PIL import Image
+
+import afterglow.filters as filters
+from afterglow.filters import to_image
+from afterglow.filters.parallel import resolve_workers
+from afterglow.pipeline import build_steps, run_chain
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# megapixel sizes benchmarked by default; frames are 4:3
+SIZES = (0.5, 2.0, 12.0, 48.0)
+
+# representative chains, named by their steps
+CHAINS: Dict[str, List[str]] = {
+    "print": ["halftone:cell=8", "glow"],
+    "psychedelic": ["perlin_warp:intensity=20", "kaleidoscope:slices=10", "glow:radii=6/20/60"],
+    "vhs": ["glitch:shift=2,line_shift=18,prob=0.2", "glow:threshold=0.7,radius=4"],
+}
+
+# what a CLI invocation imports before it touches pixels, per command kind,
+# and the seconds a fresh interpreter may take to get through it; only
+# filters that need SciPy may pay for importing it
+STARTUP_CASES: Dict[str, Tuple[str, float]] = {
+    "cli": ("afterglow.cli", 0.5),
+    "glitch": ("afterglow.cli, afterglow.filters.glitch, afterglow.io", 0.5),
+    "chain": ("afterglow.cli, afterglow.pipeline, afterglow.io", 0.5),
+    "glow": ("afterglow.cli, afterglow.filters.bloom, afterglow.io", 0.8),
+}
+
+
+@dataclass
+class BenchResult:
+    name: str
+    megapixels: float
+    seconds: float
+    peak_bytes: int
+    rss_bytes: int
+    error: Optional[str] = None
+
+    @property
+    def mp_per_s(self) -> float:
+        return self.megapixels / self.seconds if self.seconds > 0 else 0.0
+
+
+def frame_shape(megapixels: float) -> Tuple[int, int]:
+    """(height, width) of a 4:3 frame with about ``megapixels`` pixels."""
+    w = int(round(math.sqrt(megapixels * 1e6 * 4 / 3)))
+    return int(round(w * 3 / 4)), w
+
+
+def synthetic_image(megapixels: float, seed: int = 0) -> Image.Image:
+    """Deterministic test frame with gradients, edges, texture and highlights.
+
+    Thresholded filters (bloom, pixel sort) and edge detectors all find
+    something to do, so timings reflect real work.
+    """
+    h, w = frame_shape(megapixels)
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    yy /= max(1, h - 1)
+    xx /= max(1, w - 1)
+    arr = np.empty((h, w, 3), dtype=np.float32)
+    arr[..., 0] = xx
+    arr[..., 1] = yy
+    arr[..., 2] = 0.5 + 0.5 * np.sin(12.0 * (xx + yy))
+    # hard-edged blocks and a bright disc
+    arr[(np.floor(xx * 8) + np.floor(yy * 6)) % 2 == 0] *= 0.6
+    arr[(xx - 0.7) ** 2 + (yy - 0.3) ** 2 < 0.01] = 1.0
+    arr += rng.normal(0.0, 0.04, size=(h, w, 1)).astype(np.float32)
+    return to_image(np.clip(arr, 0.0, 1.0))
+
+
+def filter_cases(names: Optional[Sequence[str]] = None) -> Dict[str, Callable[[Image.Image], Any]]:
+    """Every filter in ``afterglow.filters.__all__`` at its defaults, by name."""
+    cases = {}
+    for name in filters.__all__:
+        fn = getattr(filters, name)
+        if name.endswith("_array") or not callable(fn) or isinstance(fn, type) or name == "to_image":
+            continue
+        cases[name] = fn
+    if names:
+        unknown = set(names) - set(cases) - set(CHAINS)
+        if unknown:
+            raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+        cases = {k: v for k, v in cases.items() if k in names}
+    return cases
+
+
+def chain_cases(names: Optional[Sequence[str]] = None) -> Dict[str, Callable[[Image.Image], Any]]:
+    """The :data:`CHAINS` as callables, named ``chain:<name>``."""
+    cases = {}
+    for name, specs in CHAINS.items():
+        if names and name not in names:
+            continue
+        steps = build_steps(specs)
+        cases[f"chain:{name}"] = lambda image, steps=steps: run_chain(image, steps)
+    return cases
+
+
+def measure(name: str, fn: Callable[[Image.Image], Any], image: Image.Image, repeat: int = 1) -> BenchResult:
+    """Best wall time of ``repeat`` runs plus the traced peak of one more.
+
+    Timed runs go without tracemalloc (it slows NumPy allocations); the
+    extra traced run reports peak bytes allocated during the call.
+    """
+    megapixels = image.width * image.height / 1e6
+    best = math.inf
+    try:
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            fn(image)
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            fn(image)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as exc:  # report and keep the run going
+        return BenchResult(name, megapixels, 0.0, 0, _max_rss(), f"{type(exc).__name__}: {exc}")
+    return BenchResult(name, megapixels, best, peak, _max_rss())
+
+
+def run_bench(
+    sizes: Sequence[float] = SIZES,
+    names: Optional[Sequence[str]] = None,
+    chains: bool = True,
+    repeat: int = 1,
+) -> Iterator[BenchResult]:
+    """Benchmark filters (and chains) at each size, yielding as they finish.
+
+    - names: filters or chain names to run (default: all)
+    - repeat: timed runs per case; the fastest is reported
+    """
+    cases = filter_cases(names)
+    if chains:
+        cases.update(chain_cases(names))
+    for megapixels in sizes:
+        image = synthetic_image(megapixels)
+        for name, fn in cases.items():
+            yield measure(name, fn, image, repeat)
+
+
+@dataclass
+class StartupResult:
+    name: str
+    seconds: float
+    budget: float
+    scipy: bool
+
+    @property
+    def within_budget(self) -> bool:
+        return self.seconds <= self.budget
+
+
+def measure_startup(repeat: int = 3) -> List[StartupResult]:
+    """Best wall time of ``repeat`` fresh interpreters per :data:`STARTUP_CASES`.
+
+    Includes interpreter start-up, as a job launcher pays it; also reports
+    whether SciPy got imported along the way.
+    """
+    root = str(Path(__file__).resolve().parents[1])
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))}
+    results = []
+    for name, (modules, budget) in STARTUP_CASES.items():
+        code = f"import sys; import {modules}; print('scipy' in sys.modules)"
+        best = math.inf
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+            best = min(best, time.perf_counter() - start)
+        results.append(StartupResult(name, best, budget, proc.stdout.strip() == "True"))
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and library versions recorded alongside results."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "threads": resolve_workers(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "pillow": Image.__version__,
+    }
+
+
+def write_json(results: Sequence[BenchResult], path: Path) -> None:
+    payload = {
+        "environment": environment(),
+        "results": [{**asdict(r), "mp_per_s": r.mp_per_s} for r in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def load_json(path: Path) -> Dict[Tuple[str, float], BenchResult]:
+    """Results of an earlier run keyed by ``(name, megapixels)``."""
+    payload = json.loads(path.read_text())
+    out = {}
+    for row in payload["results"]:
+        row = {k: v for k, v in row.items() if k != "mp_per_s"}
+        result = BenchResult(**row)
+        out[(result.name, round(result.megapixels, 1))] = result
+    return out
+
+
+def _max_rss() -> int:
+    # high-water mark of the whole process so far (KiB on Linux, bytes on macOS)
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == "Darwin" else rss * 1024
@@ -1,35 +1,136 @@
+import time
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import typer
-from PIL import Image
-
-from afterglow.filters.halftone import halftone_dots
-from afterglow.filters.perlin_warp import perlin_warp
-from afterglow.filters.kaleidoscope import kaleidoscope as kaleidoscope_filter
-from afterglow.filters.glitch import chromatic_aberration, scanline_glitch
-from afterglow.filters.bloom import bloom
-from afterglow.filters.pixel_sort import pixel_sort
-from afterglow.filters.flow_paint import flow_paint
-from afterglow.filters.reaction_diffusion import reaction_diffusion
-from afterglow.filters.ascii_art import ascii_art
-from afterglow.filters.crt import crt_tube
-from afterglow.filters.kuwahara import kuwahara
-from afterglow.filters.neon_edges import neon_edges
-
-app = typer.Typer(add_completion=False, help="Afterglow Lab: creative image tinkering")
 
+from afterglow.filters.parallel import configure_workers
+from afterglow.filters.precision import configure_precision
+from afterglow.filters.tracing import Tracer, span, tracing
+from afterglow.io import open_image as _open_image
 
-def _open_image(path: Path) -> Image.Image:
-    image = Image.open(path)
-    if image.mode not in ("RGB", "RGBA"):
-        image = image.convert("RGB")
-    return image
+if TYPE_CHECKING:
+    from afterglow.pipeline import StepSpec
 
+app = typer.Typer(add_completion=False, help="Afterglow Lab: creative image tinkering")
 
-def _save_image(image: Image.Image, output: Path) -> None:
-    output.parent.mkdir(parents=True, exist_ok=True)
-    image.save(output)
+# shared by every filter command and chain
+_PREVIEW = typer.Option(
+    None, "--preview", min=0.01, max=1.0, help="Render at this fraction of the size, pixel-unit params rescaled"
+)
+_REFINE = typer.Option(False, "--refine", help="After --preview, also render full size (preview -> NAME.preview.EXT)")
+
+
+def _memory_budget(value: Optional[str]) -> Optional[int]:
+    from afterglow.tiling import parse_size
+
+    if value is None:
+        return None
+    try:
+        return parse_size(value)
+    except ValueError:
+        raise typer.BadParameter(f"Invalid memory size: {value}")
+
+
+def _apply(
+    name: str, input: Path, output: Path, preview: Optional[float] = None, refine: bool = False, **params
+) -> None:
+    """Run registered filter ``name`` on ``input`` with validated ``params``."""
+    from afterglow.registry import get_filter
+
+    try:
+        steps = get_filter(name).steps(params)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    _render(input, output, steps, preview=preview, refine=refine)
+
+
+def _render(
+    input: Path,
+    output: Path,
+    steps,
+    preview: Optional[float] = None,
+    refine: bool = False,
+    max_memory: Optional[int] = None,
+    cache=None,
+) -> None:
+    """Decode ``input``, run ``steps`` and save; with ``preview``, on a downscaled proxy first."""
+    from afterglow.io import downscale_array, read_array, write_array
+    from afterglow.pipeline import preview_steps, read_input, run_array
+
+    try:
+        with span("decode"):
+            if preview is None:
+                arr, steps = read_input(input, steps)
+            else:
+                # without --refine only the proxy is needed: decode straight at (about) its size
+                arr = read_array(input, None if refine else preview)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    if preview is not None:
+        target = output.with_name(f"{output.stem}.preview{output.suffix}") if refine else output
+        start = time.perf_counter()
+        with span("preview"):
+            proxy = downscale_array(arr, preview) if refine else arr
+            result = run_array(proxy, preview_steps(steps, preview), max_memory=max_memory, cache=cache)
+            write_array(result, target)
+        typer.echo(f"preview {proxy.shape[1]}x{proxy.shape[0]} in {time.perf_counter() - start:.2f}s -> {target}")
+        if not refine:
+            return
+    result = run_array(arr, steps, max_memory=max_memory, cache=cache)
+    with span("encode"):
+        write_array(result, output)
+
+
+def _step_specs(steps: Optional[List[str]], pipeline: Optional[Path]) -> "List[StepSpec]":
+    specs: List[StepSpec] = []
+    if pipeline is not None:
+        from afterglow.pipeline import load_pipeline
+
+        try:
+            specs.extend(load_pipeline(pipeline))
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc))
+    specs.extend(steps or [])
+    if not specs:
+        raise typer.BadParameter("No steps given (pass steps or --pipeline)")
+    return specs
+
+
+def _print_plan(input: Path, kernels) -> None:
+    from afterglow.io import image_size
+    from afterglow.pipeline import step_name
+    from afterglow.registry import estimate_seconds
+
+    width, height = image_size(input)
+    seconds = estimate_seconds(kernels, width * height / 1e6)
+    typer.echo(f"{input} {width}x{height}")
+    for (kernel, params), estimate in zip(kernels, seconds):
+        args = ", ".join(f"{k}={v}" for k, v in params.items())
+        typer.echo(f"  {step_name(kernel):<22} ~{estimate:7.2f}s  {args}".rstrip())
+    typer.echo(f"  {'total':<22} ~{sum(seconds):7.2f}s  (single core, rough)")
+
+
+@app.callback()
+def main(
+    threads: Optional[int] = typer.Option(
+        None, "--threads", envvar="AFTERGLOW_THREADS", help="Threads per filter call (0 = one per CPU)"
+    ),
+    precision: Optional[str] = typer.Option(
+        None,
+        "--precision",
+        envvar="AFTERGLOW_PRECISION",
+        help="Buffer between steps: float32 (exact), float16 or uint8 (less memory, faster pixel moves)",
+    ),
+):
+    if threads is not None:
+        configure_workers(threads)
+    if precision is not None:
+        try:
+            configure_precision(precision)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc), param_hint="--precision") from None
 
 
 @app.command()
@@ -38,10 +139,41 @@ def halftone(
     output: Path = typer.Option(..., "-o", "--output", help="Output path"),
     cell: int = typer.Option(8, help="Cell size in pixels"),
     contrast: float = typer.Option(1.0, help="Contrast multiplier for dot sizing"),
+    angle: float = typer.Option(0.0, help="Screen angle in degrees (not with --cmyk)"),
+    antialias: Optional[bool] = typer.Option(
+        None, "--antialias/--no-antialias", help="Soft anti-aliased dot edges (default: on for CMYK only)"
+    ),
+    cmyk: bool = typer.Option(False, help="Four-color CMYK screens at print angles"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = halftone_dots(image, cell_size=cell, contrast=contrast)
-    _save_image(result, output)
+    if cmyk and angle != 0.0:
+        raise typer.BadParameter(
+            "CMYK screens use fixed print angles; set them with chain 'cmyk:angles=C/M/Y/K'", param_hint="--angle"
+        )
+    if cmyk:
+        _apply(
+            "halftone_cmyk",
+            input,
+            output,
+            cell=cell,
+            contrast=contrast,
+            antialias=antialias,
+            preview=preview,
+            refine=refine,
+        )
+    else:
+        _apply(
+            "halftone",
+            input,
+            output,
+            cell=cell,
+            contrast=contrast,
+            angle=angle,
+            antialias=antialias,
+            preview=preview,
+            refine=refine,
+        )
 
 
 @app.command("perlin-warp")
@@ -52,22 +184,35 @@ def perlin_warp_cmd(
     intensity: float = typer.Option(12.0, help="Pixel displacement in px"),
     octaves: int = typer.Option(3, help="Noise octaves for texture"),
     seed: int = typer.Option(42, help="Random seed for reproducibility"),
+    quality: str = typer.Option("bilinear", help="Resampling: nearest, bilinear or bicubic"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = perlin_warp(image, scale=scale, intensity=intensity, octaves=octaves, seed=seed)
-    _save_image(result, output)
+    _apply(
+        "perlin_warp",
+        input,
+        output,
+        scale=scale,
+        intensity=intensity,
+        octaves=octaves,
+        seed=seed,
+        quality=quality,
+        preview=preview,
+        refine=refine,
+    )
 
 
 @app.command()
 def kaleidoscope(
     input: Path = typer.Argument(..., exists=True, readable=True, help="Input image"),
     output: Path = typer.Option(..., "-o", "--output", help="Output path"),
-    slices: int = typer.Option(8, min=2, help="Number of mirrored slices"),
+    slices: int = typer.Option(8, help="Number of mirrored slices"),
     radius: float = typer.Option(1.0, help="Relative radius [0-1]"),
+    quality: str = typer.Option("bilinear", help="Resampling: nearest, bilinear or bicubic"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = kaleidoscope_filter(image, slices=slices, radius=radius)
-    _save_image(result, output)
+    _apply("kaleidoscope", input, output, slices=slices, radius=radius, quality=quality, preview=preview, refine=refine)
 
 
 @app.command()
@@ -77,10 +222,22 @@ def glow(
     threshold: float = typer.Option(0.85, help="Luminance threshold (0..1)"),
     strength: float = typer.Option(0.8, help="Blend amount (0..1)"),
     radius: int = typer.Option(12, help="Blur radius (px)"),
+    radii: Optional[str] = typer.Option(None, help="Comma-separated radii blended together, e.g. 6,20,60"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = bloom(image, threshold=threshold, strength=strength, radius=radius)
-    _save_image(result, output)
+    scales = radii.replace(",", "/") if radii else None
+    _apply(
+        "glow",
+        input,
+        output,
+        threshold=threshold,
+        strength=strength,
+        radius=radius,
+        radii=scales,
+        preview=preview,
+        refine=refine,
+    )
 
 
 @app.command("pixel-sort")
@@ -88,12 +245,23 @@ def pixel_sort_cmd(
     input: Path = typer.Argument(..., exists=True, readable=True, help="Input image"),
     output: Path = typer.Option(..., "-o", "--output", help="Output path"),
     threshold: float = typer.Option(0.7, help="Luminance threshold (0..1)"),
-    direction: str = typer.Option("row", help="row or col"),
+    direction: str = typer.Option("row", help="row, col, or an angle in degrees"),
     reverse: bool = typer.Option(False, help="Reverse sort order"),
+    key: str = typer.Option("lum", help="Sort by lum, hue, saturation, red, green or blue"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = pixel_sort(image, threshold=threshold, direction=direction, reverse=reverse)
-    _save_image(result, output)
+    _apply(
+        "pixel_sort",
+        input,
+        output,
+        threshold=threshold,
+        direction=direction,
+        reverse=reverse,
+        key=key,
+        preview=preview,
+        refine=refine,
+    )
 
 
 @app.command("flow-paint")
@@ -105,10 +273,27 @@ def flow_paint_cmd(
     jitter: float = typer.Option(0.3, help="Noise added to vectors"),
     blur: float = typer.Option(1.2, help="Blur for gradients"),
     seed: int = typer.Option(7, help="Random seed"),
+    pickup: float = typer.Option(0.05, help="How fast strokes take on the color beneath them"),
+    soften: float = typer.Option(0.8, help="Blur applied once to the finished strokes"),
+    max_seconds: Optional[float] = typer.Option(None, help="Stop early after this many seconds"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = flow_paint(image, steps=steps, stride=stride, jitter=jitter, blur=blur, seed=seed)
-    _save_image(result, output)
+    _apply(
+        "flow_paint",
+        input,
+        output,
+        steps=steps,
+        stride=stride,
+        jitter=jitter,
+        blur=blur,
+        seed=seed,
+        pickup=pickup,
+        soften=soften,
+        max_seconds=max_seconds,
+        preview=preview,
+        refine=refine,
+    )
 
 
 @app.command("react-diff")
@@ -120,10 +305,23 @@ def reaction_diffusion_cmd(
     kill: float = typer.Option(0.062, help="Kill rate"),
     mix: float = typer.Option(0.6, help="Blend with original"),
     seed: int = typer.Option(123, help="Random seed"),
+    sim_scale: float = typer.Option(1.0, help="Simulate at this fraction of the resolution (e.g. 0.5)"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = reaction_diffusion(image, steps=steps, feed=feed, kill=kill, mix=mix, seed=seed)
-    _save_image(result, output)
+    _apply(
+        "reaction_diffusion",
+        input,
+        output,
+        steps=steps,
+        feed=feed,
+        kill=kill,
+        mix=mix,
+        seed=seed,
+        sim_scale=sim_scale,
+        preview=preview,
+        refine=refine,
+    )
 
 
 @app.command("ascii")
@@ -132,10 +330,26 @@ def ascii_cmd(
     output: Path = typer.Option(..., "-o", "--output", help="Output path"),
     cols: int = typer.Option(120, help="Characters across"),
     invert: bool = typer.Option(False, help="Invert brightness mapping"),
+    color: bool = typer.Option(False, help="Color each character from its source cell (image mode)"),
+    mode: str = typer.Option("image", help="image, text, or ansi (24-bit color escapes)"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = ascii_art(image, cols=cols, invert=invert)
-    _save_image(result, output)
+    if mode in {"text", "ansi"}:
+        from afterglow.filters.ascii_art import ascii_text
+
+        # text is cols characters across whatever the input size, and ansi
+        # colors every character already
+        for flag, used in (("--color", color), ("--preview", preview is not None), ("--refine", refine)):
+            if used:
+                raise typer.BadParameter(f"Only for --mode image, not {mode}", param_hint=flag)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        text = ascii_text(_open_image(input), cols=cols, invert=invert, ansi=mode == "ansi")
+        output.write_text(text, encoding="utf-8")
+        return
+    if mode != "image":
+        raise typer.BadParameter(f"Unknown mode: {mode}")
+    _apply("ascii", input, output, cols=cols, invert=invert, color=color, preview=preview, refine=refine)
 
 
 @app.command("crt")
@@ -146,16 +360,22 @@ def crt_cmd(
     vignette: float = typer.Option(0.35),
     curvature: float = typer.Option(0.08),
     mask_strength: float = typer.Option(0.2),
+    quality: str = typer.Option("bilinear", help="Resampling: nearest, bilinear or bicubic"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = crt_tube(
-        image,
+    _apply(
+        "crt",
+        input,
+        output,
         scanline_strength=scanline_strength,
         vignette=vignette,
         curvature=curvature,
         mask_strength=mask_strength,
+        quality=quality,
+        preview=preview,
+        refine=refine,
     )
-    _save_image(result, output)
 
 
 @app.command("oilpaint")
@@ -163,10 +383,12 @@ def kuwahara_cmd(
     input: Path = typer.Argument(..., exists=True, readable=True, help="Input image"),
     output: Path = typer.Option(..., "-o", "--output", help="Output path"),
     radius: int = typer.Option(4, help="Neighborhood radius"),
+    mode: str = typer.Option("classic", help="classic or anisotropic (strokes follow edges)"),
+    alpha: float = typer.Option(1.0, min=1e-3, help="Anisotropic stretch; lower stretches more"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = kuwahara(image, radius=radius)
-    _save_image(result, output)
+    _apply("kuwahara", input, output, radius=radius, mode=mode, alpha=alpha, preview=preview, refine=refine)
 
 
 @app.command("neon")
@@ -176,10 +398,19 @@ def neon_cmd(
     strength: float = typer.Option(1.4),
     glow_radius: float = typer.Option(1.8),
     hue_shift: float = typer.Option(0.1),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    result = neon_edges(image, strength=strength, glow_radius=glow_radius, hue_shift=hue_shift)
-    _save_image(result, output)
+    _apply(
+        "neon",
+        input,
+        output,
+        strength=strength,
+        glow_radius=glow_radius,
+        hue_shift=hue_shift,
+        preview=preview,
+        refine=refine,
+    )
 
 @app.command("glitch")
 def glitch_cmd(
@@ -190,76 +421,332 @@ def glitch_cmd(
     line_shift: int = typer.Option(12, help="Scanline horizontal shift range"),
     prob: float = typer.Option(0.15, help="Probability a line gets shifted"),
     seed: int = typer.Option(1234, help="Random seed for reproducibility"),
+    mode: str = typer.Option("scanline", help="scanline | block | datamosh"),
+    block: int = typer.Option(16, help="Block size for block/datamosh modes"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
 ):
-    image = _open_image(input)
-    current = image
-    if aberration:
-        current = chromatic_aberration(current, shift_pixels=shift)
-    current = scanline_glitch(current, line_shift_px=line_shift, line_probability=prob, seed=seed)
-    _save_image(current, output)
+    _apply(
+        "glitch",
+        input,
+        output,
+        shift=shift if aberration else None,
+        line_shift=line_shift,
+        prob=prob,
+        seed=seed,
+        mode=mode,
+        block=block,
+        preview=preview,
+        refine=refine,
+    )
 
 
 @app.command()
 def chain(
     input: Path = typer.Argument(..., exists=True, readable=True, help="Input image"),
     output: Path = typer.Option(..., "-o", "--output", help="Output path"),
-    steps: List[str] = typer.Argument(..., help="Sequence like 'halftone:cell=8' 'perlin_warp:scale=10'"),
+    steps: Optional[List[str]] = typer.Argument(None, help="Sequence like 'halftone:cell=8' 'perlin_warp:scale=10'"),
+    pipeline: Optional[Path] = typer.Option(
+        None, "--pipeline", exists=True, readable=True, help="JSON/YAML pipeline file; its steps run first"
+    ),
+    max_memory: Optional[str] = typer.Option(
+        None, "--max-memory", help="Per-step working memory budget like 2G; big frames run in tiles"
+    ),
+    map_cache: Optional[Path] = typer.Option(
+        None, "--map-cache", help="Directory to persist coordinate maps of geometry filters across runs"
+    ),
+    profile: bool = typer.Option(False, "--profile", help="Print per-step timings and peak allocations"),
+    trace: Optional[Path] = typer.Option(
+        None, "--trace", help="Write per-stage spans as Chrome trace-event JSON (chrome://tracing, Perfetto)"
+    ),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Validate the steps and print a cost estimate only"),
+    cache: Optional[Path] = typer.Option(
+        None,
+        "--cache",
+        envvar="AFTERGLOW_CACHE",
+        help="Directory keeping step outputs; re-runs resume from the first changed step",
+    ),
+    cache_max: str = typer.Option("4G", "--cache-max", help="Disk budget of --cache; oldest outputs go first"),
+    preview: Optional[float] = _PREVIEW,
+    refine: bool = _REFINE,
+):
+    from afterglow.filters.mapcache import configure_map_cache
+    from afterglow.pipeline import build_steps
+    from afterglow.stepcache import StepCache
+
+    specs = _step_specs(steps, pipeline)
+    try:
+        kernels = build_steps(specs)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    if dry_run:
+        _print_plan(input, kernels)
+        return
+    if map_cache is not None:
+        configure_map_cache(directory=map_cache)
+    step_cache = None
+    if cache is not None:
+        # one run never reads back its own outputs, so keep them on disk only
+        step_cache = StepCache(max_bytes=0, directory=cache, max_disk_bytes=_memory_budget(cache_max))
+    # allocation tracking slows NumPy down, so a bare --trace keeps timings clean
+    tracer = Tracer(memory=profile) if profile or trace else None
+    with tracing(tracer) if tracer is not None else nullcontext():
+        _render(
+            input,
+            output,
+            kernels,
+            preview=preview,
+            refine=refine,
+            max_memory=_memory_budget(max_memory),
+            cache=step_cache,
+        )
+    if profile:
+        typer.echo(tracer.table())
+    if trace is not None:
+        tracer.write_chrome_trace(trace)
+        typer.echo(f"wrote trace {trace}")
+
+
+@app.command()
+def batch(
+    inputs: str = typer.Argument(..., help="Directory or glob pattern, e.g. 'photos/**/*.jpg'"),
+    output: Path = typer.Option(..., "-o", "--output", help="Output directory (mirrors the input's subdirectories)"),
+    steps: Optional[List[str]] = typer.Argument(None, help="Filter or chain steps like 'halftone:cell=8' 'glow'"),
+    pipeline: Optional[Path] = typer.Option(
+        None, "--pipeline", exists=True, readable=True, help="JSON/YAML pipeline file; its steps run first"
+    ),
+    workers: Optional[int] = typer.Option(None, "-j", "--workers", help="Worker processes (default: CPU count)"),
+    ext: Optional[str] = typer.Option(None, help="Output extension (default: same as input)"),
+    max_memory: Optional[str] = typer.Option(
+        None, "--max-memory", help="Per-step working memory budget per worker, like 2G"
+    ),
+    map_cache: Optional[Path] = typer.Option(
+        None, "--map-cache", help="Directory to persist coordinate maps of geometry filters across runs"
+    ),
+):
+    from afterglow.batch import collect_inputs, input_root, run_batch
+
+    specs = _step_specs(steps, pipeline)
+    sources = collect_inputs(inputs)
+    if not sources:
+        raise typer.BadParameter(f"No images matched: {inputs}")
+    start = time.perf_counter()
+    failed = 0
+    try:
+        for result in run_batch(
+            sources,
+            output,
+            specs,
+            workers=workers,
+            suffix=ext,
+            max_memory=_memory_budget(max_memory),
+            map_cache=map_cache,
+            root=input_root(inputs),
+        ):
+            if result.ok:
+                typer.echo(f"ok    {result.seconds:7.2f}s  {result.source} -> {result.output}")
+            else:
+                failed += 1
+                typer.echo(f"FAIL  {result.seconds:7.2f}s  {result.source}: {result.error}", err=True)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    elapsed = time.perf_counter() - start
+    typer.echo(f"{len(sources) - failed}/{len(sources)} images in {elapsed:.2f}s")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def video(
+    input: Path = typer.Argument(
+        ..., exists=True, readable=True, help="Animated GIF/APNG/TIFF or a directory of numbered frames"
+    ),
+    output: Path = typer.Option(
+        ..., "-o", "--output", help="Animated .gif/.png/.tif/.webp, or a directory for numbered frames"
+    ),
+    steps: Optional[List[str]] = typer.Argument(None, help="Filter or chain steps applied to every frame"),
+    pipeline: Optional[Path] = typer.Option(
+        None, "--pipeline", exists=True, readable=True, help="JSON/YAML pipeline file; its steps run first"
+    ),
+    workers: Optional[int] = typer.Option(None, "-j", "--workers", help="Worker processes (default: CPU count)"),
+    prefetch: Optional[int] = typer.Option(None, help="Frames in flight at once (default: 2x workers)"),
+    fps: Optional[float] = typer.Option(None, help="Output frame rate (default: keep source timing)"),
+    warm_start: bool = typer.Option(
+        True, help="Carry flow-paint/reaction-diffusion state between frames instead of restarting"
+    ),
+    max_memory: Optional[str] = typer.Option(
+        None, "--max-memory", help="Per-step working memory budget per worker, like 2G"
+    ),
+    map_cache: Optional[Path] = typer.Option(
+        None, "--map-cache", help="Directory to persist coordinate maps of geometry filters across runs"
+    ),
+):
+    from afterglow.video import iter_frames, process_frames, write_frames
+
+    specs = _step_specs(steps, pipeline)
+    start = time.perf_counter()
+    try:
+        frames = process_frames(
+            iter_frames(input),
+            specs,
+            workers=workers,
+            prefetch=prefetch,
+            max_memory=_memory_budget(max_memory),
+            map_cache=map_cache,
+            warm_start=warm_start,
+        )
+        count = write_frames(frames, output, duration=1000.0 / fps if fps else None)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    elapsed = time.perf_counter() - start
+    typer.echo(f"{count} frames in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.1f} fps) -> {output}")
+
+
+@app.command()
+def serve(
+    address: str = typer.Option(
+        "127.0.0.1:8765", "--address", envvar="AFTERGLOW_ADDRESS", help="host:port or unix:/path/to.sock"
+    ),
+    workers: Optional[int] = typer.Option(None, "-j", "--workers", help="Warm worker processes (default: CPU count)"),
+    max_queue: int = typer.Option(64, "--max-queue", help="Jobs waiting for a worker before new ones are refused"),
+    max_memory: Optional[str] = typer.Option(
+        None, "--max-memory", help="Per-step working memory budget per worker, like 2G"
+    ),
+    map_cache: Optional[Path] = typer.Option(
+        None, "--map-cache", help="Directory to persist coordinate maps of geometry filters across runs"
+    ),
+    root: Path = typer.Option(
+        Path("."), "--root", exists=True, file_okay=False, help="Directory jobs may read and write files under"
+    ),
+    allow_remote: bool = typer.Option(
+        False, "--allow-remote", help="Allow a TCP address other machines can reach (they get --root's files)"
+    ),
+):
+    """Keep warm workers running and take jobs from `submit` or HTTP clients."""
+    from afterglow.server import JobServer
+    from afterglow.server import serve as serve_jobs
+
+    budget = _memory_budget(max_memory)
+    jobs = JobServer(workers=workers, max_queue=max_queue, max_memory=budget, map_cache=map_cache, root=root)
+    typer.echo(f"serving on {address} with {jobs.workers} workers, files under {jobs.root}")
+    try:
+        serve_jobs(jobs, address, allow_remote=allow_remote)
+    except (ValueError, OSError) as exc:
+        jobs.close()
+        raise typer.BadParameter(str(exc))
+
+
+@app.command()
+def submit(
+    input: Path = typer.Argument(..., exists=True, readable=True, help="Input image"),
+    output: Path = typer.Option(..., "-o", "--output", help="Output path"),
+    steps: Optional[List[str]] = typer.Argument(None, help="Filter or chain steps like 'halftone:cell=8' 'glow'"),
+    pipeline: Optional[Path] = typer.Option(
+        None, "--pipeline", exists=True, readable=True, help="JSON/YAML pipeline file; its steps run first"
+    ),
+    address: str = typer.Option(
+        "127.0.0.1:8765", "--address", envvar="AFTERGLOW_ADDRESS", help="host:port or unix:/path/to.sock"
+    ),
+    upload: bool = typer.Option(
+        False, "--upload", help="Send the image bytes instead of its path (server on another filesystem)"
+    ),
+    timeout: Optional[float] = typer.Option(None, "--timeout", help="Seconds to wait for the job"),
+):
+    """Run steps on a `serve` daemon and wait for the result."""
+    from afterglow.client import JobError
+    from afterglow.client import submit as submit_job
+
+    specs = _step_specs(steps, pipeline)
+    try:
+        result = submit_job(specs, input, output, address=address, upload=upload, timeout=timeout)
+    except JobError as exc:
+        typer.echo(f"FAIL  {exc}", err=True)
+        raise typer.Exit(code=1)
+    except OSError as exc:
+        raise typer.BadParameter(f"Cannot reach server at {address}: {exc}")
+    typer.echo(f"ok    {result['seconds']:7.2f}s  {input} -> {result['output']}")
+
+
+@app.command("filters")
+def filters_cmd(
+    name: Optional[str] = typer.Argument(None, help="Show one filter's parameters"),
+):
+    """List the filters chain steps and pipeline files can use."""
+    from afterglow.registry import FILTERS, get_filter
+
+    try:
+        specs = [get_filter(name)] if name else list(FILTERS.values())
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    for spec in specs:
+        aliases = f" ({', '.join(spec.aliases)})" if spec.aliases else ""
+        typer.echo(f"{spec.name}{aliases}: {spec.help}")
+        if not name:
+            continue
+        defaults = spec.defaults()
+        for param in spec.params:
+            kind = "|".join(param.choices) if param.choices else param.type
+            default = defaults.get(param.name, "-")
+            typer.echo(f"  {param.name:<18} {kind:<28} {str(default):<12} {param.help}")
+
+
+@app.command()
+def bench(
+    sizes: str = typer.Option("0.5,2,12,48", help="Comma-separated frame sizes in megapixels"),
+    only: Optional[str] = typer.Option(None, help="Comma-separated filters or chain names to run"),
+    chains: bool = typer.Option(True, help="Also run the representative chains"),
+    repeat: int = typer.Option(1, help="Timed runs per case (the fastest is reported)"),
+    json_out: Optional[Path] = typer.Option(None, "--json", help="Write results as JSON"),
+    compare: Optional[Path] = typer.Option(
+        None, exists=True, readable=True, help="Earlier --json results to compare timings against"
+    ),
+    startup: bool = typer.Option(False, "--startup", help="Time CLI start-up against its budget instead"),
 ):
-    image = _open_image(input)
-
-    current = image
-    for step in steps:
-        if ":" in step:
-            name, raw = step.split(":", 1)
-        else:
-            name, raw = step, ""
-        params = {}
-        if raw:
-            for item in raw.split(","):
-                if not item:
-                    continue
-                key, value = item.split("=", 1)
-                # naive parsing: try int, then float, else string
-                if value.isdigit():
-                    params[key] = int(value)
-                else:
-                    try:
-                        params[key] = float(value)
-                    except ValueError:
-                        params[key] = value
-        name = name.strip().lower()
-        if name in {"halftone"}:
-            if "cell" in params and "cell_size" not in params:
-                try:
-                    params["cell_size"] = int(params.pop("cell"))
-                except Exception:
-                    params.pop("cell", None)
-            current = halftone_dots(current, **params)
-        elif name in {"perlin_warp", "perlin-warp", "warp"}:
-            current = perlin_warp(current, **params)
-        elif name in {"kaleidoscope", "kale"}:
-            current = kaleidoscope_filter(current, **params)
-        elif name in {"glitch", "scanline"}:
-            # Map friendly params
-            if "shift" in params:
-                current = chromatic_aberration(current, shift_pixels=int(params.get("shift", 3)))
-            current = scanline_glitch(
-                current,
-                line_shift_px=int(params.get("line_shift", params.get("line_shift_px", 12))),
-                line_probability=float(params.get("prob", params.get("line_probability", 0.15))),
-                seed=int(params.get("seed", 1234)),
-            )
-        elif name in {"glow", "bloom"}:
-            current = bloom(
-                current,
-                threshold=float(params.get("threshold", 0.85)),
-                strength=float(params.get("strength", 0.8)),
-                radius=int(params.get("radius", 12)),
-            )
-        else:
-            raise typer.BadParameter(f"Unknown step: {name}")
-
-    _save_image(current, output)
+    """Time every filter and a few chains on synthetic frames."""
+    from afterglow.bench import filter_cases, load_json, measure_startup, run_bench, write_json
+
+    if startup:
+        typer.echo(f"{'startup':<22} {'seconds':>9} {'budget':>7} {'scipy':>6}")
+        timings = measure_startup(repeat=max(3, repeat))
+        for t in timings:
+            over = "" if t.within_budget else "  OVER BUDGET"
+            typer.echo(f"{t.name:<22} {t.seconds:9.3f} {t.budget:7.2f} {'yes' if t.scipy else 'no':>6}{over}")
+        if not all(t.within_budget for t in timings):
+            raise typer.Exit(code=1)
+        return
+
+    try:
+        megapixels = [float(s) for s in sizes.split(",") if s]
+    except ValueError:
+        raise typer.BadParameter(f"Invalid sizes: {sizes}")
+    names = [n for n in only.split(",") if n] if only else None
+    try:
+        filter_cases(names)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    baseline = load_json(compare) if compare is not None else {}
+
+    results = []
+    typer.echo(f"{'case':<22} {'MP':>5} {'seconds':>9} {'MP/s':>8} {'peak MB':>9} {'RSS MB':>8}")
+    for result in run_bench(megapixels, names=names, chains=chains, repeat=repeat):
+        results.append(result)
+        line = f"{result.name:<22} {result.megapixels:5.1f} "
+        if result.error:
+            typer.echo(line + f"FAIL {result.error}", err=True)
+            continue
+        line += (
+            f"{result.seconds:9.3f} {result.mp_per_s:8.2f} "
+            f"{result.peak_bytes / 2**20:9.1f} {result.rss_bytes / 2**20:8.0f}"
+        )
+        before = baseline.get((result.name, round(result.megapixels, 1)))
+        if before is not None and before.seconds > 0:
+            line += f"  {result.seconds / before.seconds:5.2f}x vs baseline"
+        typer.echo(line)
+    if json_out is not None:
+        write_json(results, json_out)
+        typer.echo(f"wrote {json_out}")
+    if any(r.error for r in results):
+        raise typer.Exit(code=1)
 
 
 if __name__ == "__main__":
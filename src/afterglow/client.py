@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import base64
+import http.client
+import json
+import socket
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+# where `afterglow serve` listens and `afterglow submit` connects by default
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+
+class JobError(RuntimeError):
+    """A job the server refused or that failed while running."""
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """``("unix", path)`` for ``unix:/path``, else ``("tcp", (host, port))`` for ``host:port``."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:") :]
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid address (expected host:port or unix:/path): {address}")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def request(
+    address: str, method: str, path: str, body: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+) -> Tuple[int, Dict[str, Any]]:
+    """One JSON request to a ``serve`` daemon; returns the status and decoded body."""
+    kind, target = parse_address(address)
+    if kind == "unix":
+        conn: http.client.HTTPConnection = _UnixConnection(target, timeout=timeout)
+    else:
+        conn = http.client.HTTPConnection(*target, timeout=timeout)
+    try:
+        data = json.dumps(body).encode() if body is not None else None
+        conn.request(method, path, body=data, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+    finally:
+        conn.close()
+
+
+def submit(
+    steps: Sequence[Union[str, Dict[str, Any]]],
+    input: Path,
+    output: Path,
+    address: str = DEFAULT_ADDRESS,
+    upload: bool = False,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Run ``steps`` on ``input`` through a ``serve`` daemon and wait for the result.
+
+    - upload: send the image bytes and write the returned bytes to
+      ``output`` here, for servers that can't see this filesystem;
+      otherwise the server reads and writes the paths itself
+    - timeout: seconds to wait for the connection and the job
+    """
+    payload: Dict[str, Any] = {"steps": list(steps), "wait": True}
+    if upload:
+        payload["input_data"] = base64.b64encode(Path(input).read_bytes()).decode("ascii")
+        payload["format"] = Path(output).suffix or ".png"
+    else:
+        payload["input"] = str(Path(input).resolve())
+        payload["output"] = str(Path(output).resolve())
+    status, body = request(address, "POST", "/jobs", payload, timeout=timeout)
+    if status >= 400 or body.get("state") == "failed":
+        raise JobError(body.get("error") or f"HTTP {status}")
+    if upload:
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_bytes(base64.b64decode(body.pop("output_data")))
+        body["output"] = str(output)
+    return body
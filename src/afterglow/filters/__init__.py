@@ -1,28 +1,107 @@
-from .halftone import halftone_dots
-from .perlin_warp import perlin_warp
-from .kaleidoscope import kaleidoscope
-from .glitch import chromatic_aberration, scanline_glitch
-from .bloom import bloom
-from .pixel_sort import pixel_sort
-from .flow_paint import flow_paint
-from .reaction_diffusion import reaction_diffusion
-from .ascii_art import ascii_art
-from .crt import crt_tube
-from .kuwahara import kuwahara
-from .neon_edges import neon_edges
+"""Image filters, imported on first use.
+
+Each name below lives in its own submodule and is only imported when first
+accessed, so ``import afterglow.filters`` is cheap and using one filter
+loads just that filter's dependencies (most blurs need SciPy; glitch,
+halftone, pixel sort, ASCII, kaleidoscope, CRT and reaction-diffusion
+don't).
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# submodule -> public names it defines
+_MODULES = {
+    "halftone": ("halftone_dots", "halftone_cmyk", "halftone_dots_array", "halftone_cmyk_array"),
+    "perlin_warp": ("perlin_warp_image", "perlin_warp_array"),
+    "kaleidoscope": ("kaleidoscope_image", "kaleidoscope_array"),
+    "glitch": ("chromatic_aberration", "scanline_glitch", "chromatic_aberration_array", "scanline_glitch_array"),
+    "bloom": ("bloom_image", "bloom_array"),
+    "pixel_sort": ("pixel_sort_image", "pixel_sort_array"),
+    "flow_paint": ("flow_paint_image", "flow_paint_array", "FlowPaintState"),
+    "reaction_diffusion": ("reaction_diffusion_image", "reaction_diffusion_array", "ReactionDiffusionState"),
+    "ascii_art": ("ascii_art_image", "ascii_text", "ascii_art_array"),
+    "crt": ("crt_tube", "crt_tube_array"),
+    "kuwahara": ("kuwahara_image", "kuwahara_array"),
+    "neon_edges": ("neon_edges_image", "neon_edges_array"),
+    "_array": ("to_array", "to_image"),
+}
+_EXPORTS = {name: module for module, names in _MODULES.items() for name in names}
+
+if TYPE_CHECKING:
+    from .halftone import halftone_cmyk, halftone_cmyk_array, halftone_dots, halftone_dots_array
+    from .perlin_warp import perlin_warp_array, perlin_warp_image
+    from .kaleidoscope import kaleidoscope_array, kaleidoscope_image
+    from .glitch import (
+        chromatic_aberration,
+        chromatic_aberration_array,
+        scanline_glitch,
+        scanline_glitch_array,
+    )
+    from .bloom import bloom_array, bloom_image
+    from .pixel_sort import pixel_sort_array, pixel_sort_image
+    from .flow_paint import FlowPaintState, flow_paint_array, flow_paint_image
+    from .reaction_diffusion import ReactionDiffusionState, reaction_diffusion_array, reaction_diffusion_image
+    from .ascii_art import ascii_art_array, ascii_art_image, ascii_text
+    from .crt import crt_tube, crt_tube_array
+    from .kuwahara import kuwahara_array, kuwahara_image
+    from .neon_edges import neon_edges_array, neon_edges_image
+    from ._array import to_array, to_image
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 __all__ = [
     "halftone_dots",
-    "perlin_warp",
-    "kaleidoscope",
+    "halftone_cmyk",
+    "perlin_warp_image",
+    "kaleidoscope_image",
     "chromatic_aberration",
     "scanline_glitch",
-    "bloom",
-    "pixel_sort",
-    "flow_paint",
-    "reaction_diffusion",
-    "ascii_art",
+    "bloom_image",
+    "pixel_sort_image",
+    "flow_paint_image",
+    "reaction_diffusion_image",
+    "ascii_art_image",
+    "ascii_text",
     "crt_tube",
-    "kuwahara",
-    "neon_edges",
+    "kuwahara_image",
+    "neon_edges_image",
+]
+
+# ndarray -> ndarray kernels sharing one float32 HWC buffer in [0, 1]
+__all__ += [
+    "halftone_dots_array",
+    "halftone_cmyk_array",
+    "perlin_warp_array",
+    "kaleidoscope_array",
+    "chromatic_aberration_array",
+    "scanline_glitch_array",
+    "bloom_array",
+    "pixel_sort_array",
+    "flow_paint_array",
+    "reaction_diffusion_array",
+    "ascii_art_array",
+    "crt_tube_array",
+    "kuwahara_array",
+    "neon_edges_array",
+    "to_array",
+    "to_image",
+]
+
+# carried simulation state for frame sequences
+__all__ += [
+    "FlowPaintState",
+    "ReactionDiffusionState",
 ]
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import numpy as np
+from PIL import Image
+
+
+def to_array(image: Image.Image) -> np.ndarray:
+    """Convert a PIL image to the float32 HWC buffer the kernels operate on.
+
+    Values are RGB in [0, 1]; alpha is dropped like the filters always did.
+    """
+    arr = np.asarray(image.convert("RGB"), dtype=np.float32)
+    arr /= 255.0
+    return arr
+
+
+def to_image(arr: np.ndarray) -> Image.Image:
+    """Quantize a float32 HWC buffer in [0, 1] back to an RGB PIL image.
+
+    float16 buffers are quantized the same way; uint8 ones are used as they are.
+    """
+    if arr.dtype == np.uint8:
+        return Image.fromarray(np.ascontiguousarray(arr), mode="RGB")
+    out = np.multiply(arr, 255.0, dtype=np.float32)
+    out += 0.5
+    np.clip(out, 0.0, 255.0, out=out)
+    return Image.fromarray(out.astype(np.uint8), mode="RGB")
+
+
+def luminance(arr: np.ndarray) -> np.ndarray:
+    # perceptual luminance from sRGB (Rec. 709 weights)
+    return 0.2126 * arr[..., 0] + 0.7152 * arr[..., 1] + 0.0722 * arr[..., 2]
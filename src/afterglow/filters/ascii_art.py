@@ -1,20 +1,24 @@
 from __future__ import annotations
 
-from typing import Sequence
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+from ._array import to_array, to_image
+
 
 _ASCII_DEFAULT = "@%#*+=-:. "  # darkest -> lightest
 
 
-def ascii_art(
+def ascii_art_image(
     image: Image.Image,
     cols: int = 120,
     charset: str = _ASCII_DEFAULT,
     invert: bool = False,
     font_size: int = 10,
+    color: bool = False,
 ) -> Image.Image:
     """Render an ASCII art version of the image.
 
@@ -22,18 +26,88 @@ def ascii_art(
     - charset: characters from dark to light
     - invert: invert brightness mapping
     - font_size: font size for drawing
+    - color: tint each character with its cell's source color
     """
-    src = image.convert("L")
-    w, h = src.size
-    # aspect correction: characters are tall; tweak cell ratio
-    cell_w = max(1, w // cols)
-    cell_h = int(cell_w * 2)
-    rows = max(1, h // cell_h)
+    out = ascii_art_array(to_array(image), cols=cols, charset=charset, invert=invert, font_size=font_size, color=color)
+    return to_image(out)
+
+
+def ascii_art_array(
+    arr: np.ndarray,
+    cols: int = 120,
+    charset: str = _ASCII_DEFAULT,
+    invert: bool = False,
+    font_size: int = 10,
+    color: bool = False,
+    source_size: Optional[Tuple[int, int]] = None,
+) -> np.ndarray:
+    """Array kernel for :func:`ascii_art_image` on a float32 HWC buffer in [0, 1].
+
+    The returned canvas has its own size, set by ``cols`` and ``font_size``.
+    Each glyph is rasterized once into an atlas; the canvas is one fancy
+    index of the atlas by the per-cell character indices.
+
+    - source_size: (width, height) to lay the character grid out for, when
+      ``arr`` is a reduced decode of a larger image
+    """
+    idx, chars = _cell_indices(arr, cols, charset, invert, source_size)
+    rows = idx.shape[0]
+
+    cell_w, cell_h = font_size, int(font_size * 1.9)
+    atlas = _glyph_atlas("".join(chars), font_size)
+    # (rows, cols, cell_h, cell_w) -> (rows * cell_h, cols * cell_w)
+    ink = atlas[idx].transpose(0, 2, 1, 3).reshape(rows * cell_h, cols * cell_w)
+
+    if not color:
+        gray_out = 1.0 - ink
+        return np.repeat(gray_out[..., None], 3, axis=-1)
+
+    # black-on-white becomes source-colored glyphs on white
+    fg = _cell_colors(arr, cols, rows)
+    fg = np.repeat(np.repeat(fg, cell_h, axis=0), cell_w, axis=1)
+    return 1.0 - ink[..., None] * (1.0 - fg)
+
+
+def ascii_text(
+    image: Image.Image,
+    cols: int = 120,
+    charset: str = _ASCII_DEFAULT,
+    invert: bool = False,
+    ansi: bool = False,
+) -> str:
+    """ASCII art as text, one line per row of cells.
+
+    - ansi: wrap each character in a 24-bit color escape from its cell
+    """
+    arr = to_array(image)
+    idx, chars = _cell_indices(arr, cols, charset, invert)
+    lut = np.array(chars)
+    lines: List[str] = ["".join(row) for row in lut[idx]]
+    if not ansi:
+        return "\n".join(lines) + "\n"
+
+    rows = idx.shape[0]
+    rgb = (np.clip(_cell_colors(arr, cols, rows), 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+    out = []
+    for row_chars, row_rgb in zip(lut[idx], rgb):
+        cells = [f"\x1b[38;2;{r};{g};{b}m{ch}" for ch, (r, g, b) in zip(row_chars, row_rgb.tolist())]
+        out.append("".join(cells) + "\x1b[0m")
+    return "\n".join(out) + "\n"
+
+
+def _cell_indices(
+    arr: np.ndarray, cols: int, charset: str, invert: bool, source_size: Optional[Tuple[int, int]] = None
+) -> Tuple[np.ndarray, List[str]]:
+    # same weights PIL uses for "L" conversion
+    gray = 0.299 * arr[..., 0] + 0.587 * arr[..., 1] + 0.114 * arr[..., 2]
+    src = Image.fromarray(gray.astype(np.float32), mode="F")
+    w, h = source_size or src.size
+    rows = _rows_for(w, h, cols)
 
     small = src.resize((cols, rows), resample=Image.BICUBIC)
-    arr = np.asarray(small).astype(np.float32) / 255.0
+    lum = np.asarray(small, dtype=np.float32)
     if invert:
-        arr = 1.0 - arr
+        lum = 1.0 - lum
 
     chars: Sequence[str] = list(charset)
     if len(chars) < 2:
@@ -41,22 +115,39 @@ def ascii_art(
     num = len(chars)
 
     # map brightness to charset
-    idx = np.clip((arr * (num - 1)).round().astype(int), 0, num - 1)
+    idx = np.clip((lum * (num - 1)).round().astype(int), 0, num - 1)
+    return idx, list(chars)
 
-    # draw text onto a white canvas using monospaced font
-    out_w = cols * font_size
-    out_h = rows * int(font_size * 1.9)
-    canvas = Image.new("RGB", (out_w, out_h), "white")
-    draw = ImageDraw.Draw(canvas)
 
+def _rows_for(w: int, h: int, cols: int) -> int:
+    # aspect correction: characters are tall; tweak cell ratio
+    cell_w = max(1, w // cols)
+    cell_h = int(cell_w * 2)
+    return max(1, h // cell_h)
+
+
+def _cell_colors(arr: np.ndarray, cols: int, rows: int) -> np.ndarray:
+    """Average source color of each character cell, (rows, cols, 3)."""
+    channels = [
+        np.asarray(Image.fromarray(arr[..., c].astype(np.float32), mode="F").resize((cols, rows), Image.BOX))
+        for c in range(3)
+    ]
+    return np.stack(channels, axis=-1)
+
+
+@lru_cache(maxsize=32)
+def _glyph_atlas(chars: str, font_size: int) -> np.ndarray:
+    """Ink coverage of every glyph in its own cell, (len(chars), cell_h, cell_w)."""
+    cell_w, cell_h = font_size, int(font_size * 1.9)
     try:
         font = ImageFont.load_default()
     except Exception:
         font = None
 
-    for y in range(rows):
-        for x in range(cols):
-            ch = chars[idx[y, x]]
-            draw.text((x * font_size, y * int(font_size * 1.9)), ch, fill="black", font=font)
-
-    return canvas
+    atlas = np.zeros((len(chars), cell_h, cell_w), dtype=np.float32)
+    for i, ch in enumerate(chars):
+        glyph = Image.new("L", (cell_w, cell_h), 255)
+        ImageDraw.Draw(glyph).text((0, 0), ch, fill=0, font=font)
+        atlas[i] = 1.0 - np.asarray(glyph, dtype=np.float32) / 255.0
+    atlas.setflags(write=False)
+    return atlas
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+from typing import Tuple
+
 import numpy as np
 from PIL import Image
-from scipy import ndimage as ndi
+
+from ._array import to_array, to_image
+from .mapcache import MAP_CACHE
+from .parallel import resolve_workers, row_bands, thread_map
+from .resample import remap
+from .tracing import span
 
 
 def crt_tube(
@@ -11,43 +18,85 @@ def crt_tube(
     vignette: float = 0.35,
     curvature: float = 0.08,
     mask_strength: float = 0.2,
+    quality: str = "bilinear",
 ) -> Image.Image:
     """Retro CRT effect with curvature, scanlines, and RGB mask.
     """
-    src = image.convert("RGB")
-    arr = np.asarray(src).astype(np.float32) / 255.0
+    out = crt_tube_array(
+        to_array(image),
+        scanline_strength=scanline_strength,
+        vignette=vignette,
+        curvature=curvature,
+        mask_strength=mask_strength,
+        quality=quality,
+    )
+    return to_image(out)
+
+
+def crt_tube_array(
+    arr: np.ndarray,
+    scanline_strength: float = 0.25,
+    vignette: float = 0.35,
+    curvature: float = 0.08,
+    mask_strength: float = 0.2,
+    quality: str = "bilinear",
+    rows: slice | None = None,
+    workers: int | None = None,
+) -> np.ndarray:
+    """Array kernel for :func:`crt_tube` on a float32 HWC buffer in [0, 1].
+
+    - quality: "nearest", "bilinear" or "bicubic" resampling
+    - rows: only render this band of output rows (sampling the whole input)
+    - workers: threads rendering row bands (default: :func:`configure_workers`)
+    """
     h, w = arr.shape[:2]
+    bands = row_bands(rows, h, resolve_workers(workers))
+    if len(bands) > 1:
+
+        def render(band: slice) -> np.ndarray:
+            return crt_tube_array(arr, scanline_strength, vignette, curvature, mask_strength, quality, rows=band)
+
+        return np.concatenate(thread_map(render, bands, len(bands)))
+    y0, y1 = (0, h) if rows is None else rows.indices(h)[:2]
+
+    with span("maps"):
+        Y, X, vign = MAP_CACHE.get(
+            ("crt", h, w, y0, y1, float(curvature), float(vignette)),
+            lambda: _barrel_maps(h, w, y0, y1, curvature, vignette),
+        )
+    warped = remap(arr, Y, X, order=quality, mode="reflect")
+
+    # Scanlines (darken every other row)
+    lines = (np.sin(np.pi * (np.arange(y0, y1, dtype=np.float32) / 2.0)) * 0.5 + 0.5)
+    warped *= (1.0 - scanline_strength + scanline_strength * lines)[:, None, None]
+
+    # Trinitron-like RGB mask: one (w, 3) gain pattern shared by every row
+    phase = np.arange(w) % 3
+    gain = np.full((w, 3), 1.0 - mask_strength, dtype=np.float32)
+    gain[np.arange(w), phase] = 2.0
+    warped *= gain
+    np.clip(warped, 0.0, 1.0, out=warped)
+
+    # Vignette
+    warped *= vign[..., None]
+
+    return np.clip(warped, 0.0, 1.0, out=warped)
+
 
+def _barrel_maps(h: int, w: int, y0: int, y1: int, curvature: float, vignette: float) -> Tuple[np.ndarray, ...]:
+    """Barrel-distorted sampling coordinates and vignette for rows y0..y1."""
     # Curvature via barrel distortion
-    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
     cx, cy = (w - 1) / 2.0, (h - 1) / 2.0
-    x = (xx - cx) / cx
-    y = (yy - cy) / cy
+    x = (np.arange(w, dtype=np.float32) - cx) / cx
+    y = (np.arange(y0, y1, dtype=np.float32)[:, None] - cy) / cy
     r2 = x * x + y * y
+    # the corners are farthest from the center, whichever band we render
+    r2_max = np.float32(2.0)
     k = curvature
     x_d = x * (1 + k * r2)
     y_d = y * (1 + k * r2)
     X = cx + x_d * cx
     Y = cy + y_d * cy
 
-    warped = np.zeros_like(arr)
-    for c in range(3):
-        warped[..., c] = ndi.map_coordinates(arr[..., c], [Y, X], order=1, mode="reflect")
-
-    # Scanlines (darken every other row)
-    lines = (np.sin(np.pi * (yy / 2.0)) * 0.5 + 0.5)
-    warped *= (1.0 - scanline_strength + scanline_strength * lines)[..., None]
-
-    # Trinitron-like RGB mask
-    mask = np.zeros_like(arr)
-    mask[..., 0] = ((xx % 3) == 0).astype(np.float32)
-    mask[..., 1] = ((xx % 3) == 1).astype(np.float32)
-    mask[..., 2] = ((xx % 3) == 2).astype(np.float32)
-    warped = np.clip(warped * (1.0 - mask_strength) + warped * mask * (1.0 + mask_strength), 0.0, 1.0)
-
-    # Vignette
-    vign = 1.0 - vignette * (r2 / r2.max())
-    warped *= vign[..., None]
-
-    out = (np.clip(warped, 0.0, 1.0) * 255.0).astype(np.uint8)
-    return Image.fromarray(out, mode="RGB")
+    vign = 1.0 - vignette * (r2 / r2_max)
+    return Y.astype(np.float32), X.astype(np.float32), vign.astype(np.float32)
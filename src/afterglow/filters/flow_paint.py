@@ -1,63 +1,194 @@
 from __future__ import annotations
 
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
 import numpy as np
 from PIL import Image
 from scipy import ndimage as ndi
 
+from ._array import luminance, to_array, to_image
+from .parallel import thread_map
+from .tracing import span
+
 
-def flow_paint(
+def flow_paint_image(
     image: Image.Image,
     steps: int = 800,
     stride: int = 3,
     jitter: float = 0.3,
     blur: float = 1.2,
     seed: int = 7,
+    pickup: float = 0.05,
+    soften: float = 0.8,
+    max_seconds: Optional[float] = None,
 ) -> Image.Image:
     """Painty flow-field effect using image gradients as a vector field.
 
-    Starts from a blurred image and iteratively advects colors along the
-    gradient flow with small jitter. Looks like wispy brush strokes.
+    Particles seeded on a grid follow the image's isophotes with small
+    jitter, picking up color as they go and depositing it along their
+    paths. Looks like wispy brush strokes.
+
+    - steps: advection steps per particle
+    - stride: particle grid spacing in pixels
+    - jitter: noise added to the unit flow vectors
+    - blur: blur for the gradients the flow follows
+    - pickup: how fast a particle's paint takes on the color beneath it
+    - soften: blur applied once to the finished strokes
+    - max_seconds: stop advecting early once this much time has passed
+    """
+    out = flow_paint_array(
+        to_array(image),
+        steps=steps,
+        stride=stride,
+        jitter=jitter,
+        blur=blur,
+        seed=seed,
+        pickup=pickup,
+        soften=soften,
+        max_seconds=max_seconds,
+    )
+    return to_image(out)
+
+
+@dataclass
+class FlowPaintState:
+    """Simulation carried from one frame to the next for coherent sequences.
+
+    Pass the same instance to :func:`flow_paint_array` for every frame; the
+    first frame runs the full ``steps``, later ones continue the particles
+    for ``warm_steps`` over strokes that keep ``carry`` of their weight.
+    """
+
+    warm_steps: int = 40
+    carry: float = 0.5
+    yy: Optional[np.ndarray] = None
+    xx: Optional[np.ndarray] = None
+    paint: Optional[np.ndarray] = None
+    strokes: Optional[np.ndarray] = None
+    rng: Optional[np.random.Generator] = None
+
+    def reset(self) -> None:
+        self.yy = self.xx = self.paint = self.strokes = self.rng = None
+
+
+def flow_paint_array(
+    arr: np.ndarray,
+    steps: int = 800,
+    stride: int = 3,
+    jitter: float = 0.3,
+    blur: float = 1.2,
+    seed: int = 7,
+    pickup: float = 0.05,
+    soften: float = 0.8,
+    max_seconds: Optional[float] = None,
+    state: Optional[FlowPaintState] = None,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """Array kernel for :func:`flow_paint_image` on a float32 HWC buffer in [0, 1].
+
+    The unit flow field is built once and looked up per particle with a
+    flat gather; deposits of a run of steps are summed into the canvas by
+    one ``bincount`` per channel, and the strokes are softened once at the
+    end instead of blurring the whole canvas every step.
+
+    - state: warm-start from the previous frame's particles and strokes
+    - workers: threads for the per-channel deposit sums and softening
+      (default: :func:`configure_workers`); advection itself is serial
     """
-    rng = np.random.default_rng(seed)
+    deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+    h, w = arr.shape[:2]
+    with span("flow field"):
+        flow_y, flow_x = _flow_field(arr, blur)
+    colors = arr.reshape(h * w, 3)
+
+    # strokes: per-pixel sums of deposited R, G, B and deposit count
+    if state is not None and state.strokes is not None and state.strokes.shape == (4, h * w):
+        rng, yy, xx, paint = state.rng, state.yy, state.xx, state.paint
+        strokes = state.strokes * np.float32(state.carry)
+        steps = state.warm_steps
+    else:
+        rng = np.random.default_rng(seed)
+        yy, xx = np.mgrid[0:h:stride, 0:w:stride]
+        yy = yy.astype(np.float32).ravel()
+        xx = xx.astype(np.float32).ravel()
+        paint = colors[_flat_index(yy, xx, w)]
+        strokes = np.zeros((4, h * w), dtype=np.float32)
+
+    # deposit indices are batched so each bincount covers about a frame
+    chunk = max(1, (h * w) // max(1, yy.size))
+    pickup = np.float32(pickup)
+    n_particles = yy.size
+    flow = np.stack([flow_y, flow_x], axis=-1)
+    done = 0
+    while done < steps:
+        n = min(chunk, steps - done)
+        idx_log = np.empty((n, n_particles), dtype=np.intp)
+        paint_log = np.empty((n, n_particles, 3), dtype=np.float32)
+        # fresh jitter for the whole run of steps in one draw; uniform noise
+        # with the standard deviation ``jitter`` is 4x cheaper than normals
+        noise = rng.random((n, 2, n_particles), dtype=np.float32)
+        noise -= np.float32(0.5)
+        noise *= np.float32(jitter * math.sqrt(12.0))
+        with span("advect"):
+            for i in range(n):
+                v = np.take(flow, _flat_index(yy, xx, w), axis=0)
+                yy += v[:, 0]
+                yy += noise[i, 0]
+                xx += v[:, 1]
+                xx += noise[i, 1]
+                np.clip(yy, 0, h - 1, out=yy)
+                np.clip(xx, 0, w - 1, out=xx)
+
+                idx = _flat_index(yy, xx, w)
+                # paint drifts toward the color under the brush, then is laid down
+                under = np.take(colors, idx, axis=0)
+                under -= paint
+                under *= pickup
+                paint += under
+                idx_log[i] = idx
+                paint_log[i] = paint
+        with span("deposit"):
+            flat = idx_log.ravel()
+
+            def deposit(c: int) -> None:
+                weights = paint_log[..., c].ravel() if c < 3 else None
+                strokes[c] += np.bincount(flat, weights=weights, minlength=h * w).astype(np.float32)
+
+            thread_map(deposit, range(4), workers)
+        done += n
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+
+    if state is not None:
+        state.rng, state.yy, state.xx, state.paint, state.strokes = rng, yy, xx, paint, strokes
+
+    # unvisited pixels fall back to the source; busy ones are all stroke
+    canvas = strokes[:3].T.reshape(h, w, 3) + arr * np.float32(0.5)
+    canvas /= (strokes[3] + np.float32(0.5)).reshape(h, w, 1)
+    if soften > 0:
+        with span("soften"):
+            planes = thread_map(lambda c: ndi.gaussian_filter(canvas[..., c], sigma=soften), range(3), workers)
+            canvas = np.stack(planes, axis=-1)
+    return np.clip(canvas, 0.0, 1.0)
+
+
+def _flat_index(yy: np.ndarray, xx: np.ndarray, w: int) -> np.ndarray:
+    # positions are clipped to the frame, so +0.5 and truncate rounds them
+    idx = (yy + np.float32(0.5)).astype(np.intp)
+    idx *= w
+    idx += (xx + np.float32(0.5)).astype(np.intp)
+    return idx
 
-    src = image.convert("RGB")
-    arr = np.asarray(src).astype(np.float32) / 255.0
 
+def _flow_field(arr: np.ndarray, blur: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Unit vectors along the isophotes, flattened for per-particle gathers."""
     # compute gradients on a blurred version
-    gray = 0.2126 * arr[..., 0] + 0.7152 * arr[..., 1] + 0.0722 * arr[..., 2]
+    gray = luminance(arr)
     gray_blur = ndi.gaussian_filter(gray, sigma=blur)
     gy, gx = np.gradient(gray_blur)
     # rotate gradients 90deg to follow isophotes (artistic)
-    vx = -gy
-    vy = gx
-
-    h, w = gray.shape
-    yy, xx = np.mgrid[0:h:stride, 0:w:stride]
-    yy = yy.astype(np.float32)
-    xx = xx.astype(np.float32)
-
-    canvas = arr.copy()
-
-    for _ in range(steps):
-        # sample velocities at subpixel coords
-        vxs = ndi.map_coordinates(vx, [yy, xx], order=1, mode="reflect")
-        vys = ndi.map_coordinates(vy, [yy, xx], order=1, mode="reflect")
-        # normalize and jitter
-        mag = np.sqrt(vxs * vxs + vys * vys) + 1e-6
-        vxs = (vxs / mag) + rng.normal(0.0, jitter, size=vxs.shape)
-        vys = (vys / mag) + rng.normal(0.0, jitter, size=vys.shape)
-
-        # advect sample points and splat color back to canvas
-        yy = np.clip(yy + vys, 0, h - 1)
-        xx = np.clip(xx + vxs, 0, w - 1)
-
-        for c in range(3):
-            color = ndi.map_coordinates(arr[..., c], [yy, xx], order=1, mode="reflect")
-            canvas[..., c][::stride, ::stride] = color
-
-        # slight blur to soften strokes over time
-        for c in range(3):
-            canvas[..., c] = ndi.gaussian_filter(canvas[..., c], 0.5)
-
-    out = np.clip(canvas * 255.0, 0, 255).astype(np.uint8)
-    return Image.fromarray(out, mode="RGB")
+    mag = np.sqrt(gx * gx + gy * gy) + 1e-6
+    return (gx / mag).astype(np.float32).ravel(), (-gy / mag).astype(np.float32).ravel()
@@ -1,26 +1,23 @@
 from __future__ import annotations
 
-import random
-from typing import Tuple
-
 import numpy as np
 from PIL import Image
 
+from ._array import to_array, to_image
+
 
 def chromatic_aberration(image: Image.Image, shift_pixels: int = 3) -> Image.Image:
-    src = image.convert("RGB")
-    arr = np.asarray(src)
-    h, w = arr.shape[:2]
+    return to_image(chromatic_aberration_array(to_array(image), shift_pixels=shift_pixels))
+
 
-    shifted = np.zeros_like(arr)
+def chromatic_aberration_array(arr: np.ndarray, shift_pixels: int = 3) -> np.ndarray:
+    """Array kernel for :func:`chromatic_aberration` on an HWC buffer of any precision."""
+    shifted = np.empty_like(arr)
     # shift red right, blue left
     shifted[..., 0] = np.roll(arr[..., 0], shift_pixels, axis=1)
     shifted[..., 1] = arr[..., 1]
     shifted[..., 2] = np.roll(arr[..., 2], -shift_pixels, axis=1)
-    return Image.fromarray(shifted, mode="RGB")
-
-
-essential_rng = random.Random()
+    return shifted
 
 
 def scanline_glitch(
@@ -28,23 +25,74 @@ def scanline_glitch(
     line_shift_px: int = 12,
     line_probability: float = 0.15,
     seed: int | None = 1234,
+    mode: str = "scanline",
+    block: int = 16,
 ) -> Image.Image:
-    """Randomly shift horizontal scanlines for a datamosh-y look."""
-    if seed is not None:
-        essential_rng.seed(seed)
+    """Randomly shift horizontal scanlines for a datamosh-y look.
+
+    - mode: "scanline" (whole rows slide sideways), "block" (square blocks
+      slide sideways) or "datamosh" (blocks copy pixels from a random
+      nearby spot, like corrupted motion vectors)
+    - block: block size in pixels for the block modes
+    """
+    out = scanline_glitch_array(
+        to_array(image),
+        line_shift_px=line_shift_px,
+        line_probability=line_probability,
+        seed=seed,
+        mode=mode,
+        block=block,
+    )
+    return to_image(out)
 
-    src = image.convert("RGB")
-    arr = np.asarray(src)
+
+def scanline_glitch_array(
+    arr: np.ndarray,
+    line_shift_px: int = 12,
+    line_probability: float = 0.15,
+    seed: int | None = 1234,
+    mode: str = "scanline",
+    block: int = 16,
+) -> np.ndarray:
+    """Array kernel for :func:`scanline_glitch` on an HWC buffer of any precision.
+
+    All shifts are drawn up front from a generator local to the call (so
+    concurrent calls don't share state), then every affected row is rebuilt
+    by one gather through a precomputed source index array.
+    """
+    rng = np.random.default_rng(seed)
     h, w = arr.shape[:2]
+    span = int(line_shift_px)
+
+    if mode == "scanline":
+        shift = np.where(rng.random(h) < line_probability, rng.integers(-span, span + 1, size=h), 0)
+        rows = np.flatnonzero(shift)
+        src_y = rows[:, None]
+        dx = shift[rows, None]
+    elif mode in {"block", "datamosh"}:
+        b = max(1, int(block))
+        gh, gw = -(-h // b), -(-w // b)
+        hit = rng.random((gh, gw)) < line_probability
+        grid_dx = np.where(hit, rng.integers(-span, span + 1, size=(gh, gw)), 0)
+        rows = np.flatnonzero(np.repeat(hit.any(axis=1), b)[:h])
+        dx = np.repeat(grid_dx[rows // b], b, axis=1)[:, :w]
+        src_y = rows[:, None]
+        if mode == "datamosh":
+            grid_dy = np.where(hit, rng.integers(-span, span + 1, size=(gh, gw)), 0)
+            dy = np.repeat(grid_dy[rows // b], b, axis=1)[:, :w]
+            src_y = np.clip(src_y - dy, 0, h - 1)
+    else:
+        raise ValueError(f"Unknown glitch mode: {mode}")
 
     out = arr.copy()
-    for y in range(h):
-        if essential_rng.random() < line_probability:
-            shift = essential_rng.randint(-line_shift_px, line_shift_px)
-            out[y, ...] = np.roll(out[y, ...], shift, axis=0)
+    if rows.size:
+        # source pixel of every output pixel in the affected rows (wrapping
+        # sideways like np.roll), gathered as whole RGB pixels
+        src = src_y * w + (np.arange(w) - dx) % w
+        out[rows] = np.take(arr.reshape(h * w, 3), src, axis=0)
+    if mode == "scanline":
         # subtle color drift every few lines
-        if y % 23 == 0:
-            out[y, :, 0] = np.roll(out[y, :, 0], 1, axis=0)
-            out[y, :, 2] = np.roll(out[y, :, 2], -1, axis=0)
-
-    return Image.fromarray(out, mode="RGB")
+        drift = np.arange(0, h, 23)
+        out[drift, :, 0] = np.roll(out[drift, :, 0], 1, axis=1)
+        out[drift, :, 2] = np.roll(out[drift, :, 2], -1, axis=1)
+    return out
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import math
-from typing import Tuple
+from typing import Sequence, Tuple
 
 import numpy as np
-from PIL import Image, ImageDraw
+from PIL import Image
+
+from ._array import to_array, to_image
 
 
 def _luminance(rgb: np.ndarray) -> np.ndarray:
@@ -13,41 +15,178 @@ def _luminance(rgb: np.ndarray) -> np.ndarray:
     return 0.2126 * r + 0.7152 * g + 0.0722 * b
 
 
-def halftone_dots(image: Image.Image, cell_size: int = 8, contrast: float = 1.0) -> Image.Image:
+def halftone_dots(
+    image: Image.Image,
+    cell_size: int = 8,
+    contrast: float = 1.0,
+    angle: float = 0.0,
+    antialias: bool = False,
+) -> Image.Image:
     """Simple circular-dots halftone.
 
     - cell_size: grid size in pixels
     - contrast: scales dot size response (1.0 is linear)
+    - angle: screen angle in degrees
+    - antialias: soft dot edges instead of hard pixels
     """
-    src = image.convert("RGB")
-    w, h = src.size
+    out = halftone_dots_array(to_array(image), cell_size=cell_size, contrast=contrast, angle=angle, antialias=antialias)
+    return to_image(out)
+
 
-    pixels = np.asarray(src).astype(np.float32) / 255.0
-    lum = _luminance(pixels)
+def halftone_dots_array(
+    arr: np.ndarray,
+    cell_size: int = 8,
+    contrast: float = 1.0,
+    angle: float = 0.0,
+    antialias: bool = False,
+) -> np.ndarray:
+    """Array kernel for :func:`halftone_dots` on a float32 HWC buffer in [0, 1]."""
+    lum = _luminance(arr)
 
     # Adjust contrast by raising to a power (gamma-like)
     if contrast != 1.0:
         lum = np.clip(lum, 0.0, 1.0) ** (1.0 / max(1e-5, contrast))
 
-    out = Image.new("RGB", (w, h), color="white")
-    draw = ImageDraw.Draw(out)
-
-    radius_max = cell_size * math.sqrt(2) / 2.0
-
-    for y in range(0, h, cell_size):
-        for x in range(0, w, cell_size):
-            y1 = min(y + cell_size, h)
-            x1 = min(x + cell_size, w)
-            block = lum[y:y1, x:x1]
-            # mean luminance -> smaller dots for brighter areas
-            m = float(np.mean(block))
-            # invert so darker areas have larger dots
-            size = (1.0 - m) * radius_max
-            cx = x + (x1 - x) / 2.0
-            cy = y + (y1 - y) / 2.0
-            r = max(0.0, size)
-            if r > 0.5:
-                bbox = (cx - r, cy - r, cx + r, cy + r)
-                draw.ellipse(bbox, fill="black")
-
-    return out
+    # invert so darker areas have larger dots
+    coverage = _screen(1.0 - lum, cell_size, angle, antialias)
+    gray = 1.0 - coverage
+    return np.repeat(gray[..., None], 3, axis=-1)
+
+
+def halftone_cmyk(
+    image: Image.Image,
+    cell_size: int = 8,
+    contrast: float = 1.0,
+    angles: Sequence[float] = (15.0, 75.0, 0.0, 45.0),
+    antialias: bool = True,
+) -> Image.Image:
+    """Four-color print halftone with one rotated dot screen per ink.
+
+    - cell_size: grid size in pixels
+    - contrast: scales dot size response (1.0 is linear)
+    - angles: C, M, Y, K screen angles in degrees
+    - antialias: soft dot edges instead of hard pixels
+    """
+    out = halftone_cmyk_array(to_array(image), cell_size=cell_size, contrast=contrast, angles=angles, antialias=antialias)
+    return to_image(out)
+
+
+def halftone_cmyk_array(
+    arr: np.ndarray,
+    cell_size: int = 8,
+    contrast: float = 1.0,
+    angles: Sequence[float] = (15.0, 75.0, 0.0, 45.0),
+    antialias: bool = True,
+) -> np.ndarray:
+    """Array kernel for :func:`halftone_cmyk` on a float32 HWC buffer in [0, 1]."""
+    rgb = np.clip(arr, 0.0, 1.0)
+    k = 1.0 - rgb.max(axis=-1)
+    denom = np.maximum(1.0 - k, 1e-6)
+    inks = [(1.0 - rgb[..., c] - k) / denom for c in range(3)] + [k]
+
+    paper = np.ones_like(rgb)
+    for channel, (ink, theta) in enumerate(zip(inks, angles)):
+        if contrast != 1.0:
+            ink = 1.0 - np.clip(1.0 - ink, 0.0, 1.0) ** (1.0 / max(1e-5, contrast))
+        keep = 1.0 - _screen(ink, cell_size, theta, antialias)
+        if channel == 3:
+            paper *= keep[..., None]
+        else:
+            # cyan absorbs red, magenta green, yellow blue
+            paper[..., channel] *= keep
+    return paper
+
+
+def _cells(
+    h: int, w: int, cell: int, angle: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Tuple[int, int]]:
+    """Screen-space coordinates and cell indices of every pixel center."""
+    x = np.arange(w, dtype=np.float32) + 0.5
+    y = np.arange(h, dtype=np.float32) + 0.5
+    if angle % 360.0 == 0.0:
+        u, v = x[None, :], y[:, None]
+    else:
+        a = math.radians(angle)
+        ca, sa = np.float32(math.cos(a)), np.float32(math.sin(a))
+        u = x[None, :] * ca + y[:, None] * sa
+        v = y[:, None] * ca - x[None, :] * sa
+    iu = np.floor(u / cell).astype(np.intp)
+    iv = np.floor(v / cell).astype(np.intp)
+    iu -= iu.min()
+    iv -= iv.min()
+    grid = (int(iv.max()) + 1, int(iu.max()) + 1)
+    return u, v, iu, iv, grid
+
+
+def _screen(ink: np.ndarray, cell_size: int, angle: float = 0.0, antialias: bool = False) -> np.ndarray:
+    """Rasterize a dot screen for an ink amount field in [0, 1].
+
+    Every cell gets one dot whose radius follows the cell's mean ink, placed
+    at the centroid of the cell's pixels. Returns ink coverage in [0, 1].
+    """
+    h, w = ink.shape
+    cell = max(1, int(cell_size))
+    u, v, iu, iv, (ny, nx) = _cells(h, w, cell, angle)
+
+    if u.shape[0] == 1:
+        # axis-aligned: block sums by reshaping the zero-padded field
+        padded = np.zeros((ny * cell, nx * cell), dtype=np.float32)
+        padded[:h, :w] = ink
+        sums = padded.reshape(ny, cell, nx, cell).sum(axis=(1, 3))
+        starts_x = np.arange(nx) * cell
+        starts_y = np.arange(ny) * cell
+        widths = np.minimum(starts_x + cell, w) - starts_x
+        heights = np.minimum(starts_y + cell, h) - starts_y
+        means = sums / np.outer(heights, widths)
+        # center of the (possibly clipped) cell
+        cu = np.broadcast_to((starts_x + widths / 2.0)[None, :], (ny, nx))
+        cv = np.broadcast_to((starts_y + heights / 2.0)[:, None], (ny, nx))
+    else:
+        flat = (iv * nx + iu).ravel()
+        counts = np.bincount(flat, minlength=ny * nx)
+        safe = np.maximum(counts, 1)
+        means = (np.bincount(flat, weights=ink.ravel(), minlength=ny * nx) / safe).reshape(ny, nx)
+        cu = (np.bincount(flat, weights=u.ravel(), minlength=ny * nx) / safe).reshape(ny, nx)
+        cv = (np.bincount(flat, weights=v.ravel(), minlength=ny * nx) / safe).reshape(ny, nx)
+
+    radius_max = cell * math.sqrt(2) / 2.0
+    radius = np.clip(means, 0.0, 1.0) * radius_max
+    if not antialias:
+        radius = np.where(radius > 0.5, radius, 0.0)
+
+    # pad by one empty cell so neighbor lookups never leave the grid
+    radius = np.pad(radius.astype(np.float32), 1)
+    cu = np.pad(np.asarray(cu, dtype=np.float32), 1)
+    cv = np.pad(np.asarray(cv, dtype=np.float32), 1)
+
+    # dots reach past their own cell (radius_max > cell / 2), so also test
+    # the four edge neighbors; diagonal ones can at most touch the corner
+    coverage = np.zeros((h, w), dtype=np.float32 if antialias else bool)
+    dist2 = np.empty((h, w), dtype=np.float32)
+    r2 = radius * radius
+    if u.shape[0] != 1:
+        # flat index into the padded grid; neighbors are constant offsets
+        base = (iv + 1) * (nx + 2) + (iu + 1)
+        flat_u, flat_v = cu.ravel(), cv.ravel()
+        flat_r = (radius if antialias else r2).ravel()
+    for dv, du in ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)):
+        if u.shape[0] == 1:
+            # separable: 1D offsets per row/column, whole-row radius lookups
+            ju = iu[0] + (1 + du)
+            jv = iv[:, 0] + (1 + dv)
+            np.add((u[0] - cu[1, ju]) ** 2, ((v[:, 0] - cv[jv, 1]) ** 2)[:, None], out=dist2)
+            grid = radius if antialias else r2
+            r = np.take(grid[jv], ju, axis=1)
+        else:
+            idx = base + (dv * (nx + 2) + du)
+            np.add((u - np.take(flat_u, idx)) ** 2, (v - np.take(flat_v, idx)) ** 2, out=dist2)
+            r = np.take(flat_r, idx)
+        if antialias:
+            dot = np.sqrt(dist2)
+            np.subtract(r + 0.5, dot, out=dot)
+            np.clip(dot, 0.0, 1.0, out=dot)
+            dot[r <= 0.0] = 0.0
+            np.maximum(coverage, dot, out=coverage)
+        else:
+            coverage |= dist2 <= r
+    return coverage.astype(np.float32, copy=False)
@@ -5,20 +5,67 @@ from typing import Tuple
 
 import numpy as np
 from PIL import Image
-from scipy import ndimage as ndi
 
+from ._array import to_array, to_image
+from .mapcache import MAP_CACHE
+from .parallel import resolve_workers, row_bands, thread_map
+from .resample import remap
+from .tracing import span
 
-def kaleidoscope(image: Image.Image, slices: int = 8, radius: float = 1.0) -> Image.Image:
+
+def kaleidoscope_image(
+    image: Image.Image, slices: int = 8, radius: float = 1.0, quality: str = "bilinear"
+) -> Image.Image:
+    return to_image(kaleidoscope_array(to_array(image), slices=slices, radius=radius, quality=quality))
+
+
+def kaleidoscope_array(
+    arr: np.ndarray,
+    slices: int = 8,
+    radius: float = 1.0,
+    quality: str = "bilinear",
+    rows: slice | None = None,
+    workers: int | None = None,
+) -> np.ndarray:
+    """Array kernel for :func:`kaleidoscope_image` on an HWC buffer of any precision.
+
+    8-bit buffers are sampled as they are (exactly with "nearest", rounded
+    to the nearest level otherwise).
+
+    - quality: "nearest", "bilinear" or "bicubic" resampling
+    - rows: only render this band of output rows (sampling the whole input)
+    - workers: threads rendering row bands (default: :func:`configure_workers`)
+    """
     assert slices >= 2
-    src = image.convert("RGB")
-    np_img = np.asarray(src).astype(np.float32)
-    h, w = np_img.shape[:2]
+    h, w = arr.shape[:2]
+    bands = row_bands(rows, h, resolve_workers(workers))
+    if len(bands) > 1:
 
-    cx, cy = w / 2.0, h / 2.0
-    yy, xx = np.meshgrid(np.arange(h), np.arange(w), indexing="ij")
+        def render(band: slice) -> np.ndarray:
+            return kaleidoscope_array(arr, slices, radius, quality, rows=band)
+
+        return np.concatenate(thread_map(render, bands, len(bands)))
+    y0, y1 = (0, h) if rows is None else rows.indices(h)[:2]
 
-    dx = xx - cx
-    dy = yy - cy
+    with span("maps"):
+        y_m, x_m, inside = MAP_CACHE.get(
+            ("kaleidoscope", h, w, y0, y1, int(slices), float(radius)),
+            lambda: _fold_maps(h, w, y0, y1, slices, radius),
+        )
+    out = remap(arr, y_m, x_m, order=quality, mode="reflect")
+    # leave outside radius black
+    np.multiply(out, inside[..., None], out=out, casting="unsafe")
+
+    # remap clips 8-bit output, and float16 output is nearest samples
+    return np.clip(out, 0.0, 1.0, out=out) if out.dtype == np.float32 else out
+
+
+def _fold_maps(h: int, w: int, y0: int, y1: int, slices: int, radius: float) -> Tuple[np.ndarray, ...]:
+    """Sampling coordinates and inside-radius mask for output rows y0..y1."""
+    cx, cy = w / 2.0, h / 2.0
+    # float32 row and column vectors broadcast into float32 maps
+    dx = np.arange(w, dtype=np.float32) - np.float32(cx)
+    dy = np.arange(y0, y1, dtype=np.float32)[:, None] - np.float32(cy)
     r = np.sqrt(dx * dx + dy * dy)
     theta = np.arctan2(dy, dx)
 
@@ -35,14 +82,4 @@ def kaleidoscope(image: Image.Image, slices: int = 8, radius: float = 1.0) -> Im
     # Clamp radius
     r_max = radius * min(cx, cy)
     mask = r <= r_max
-
-    out = np.zeros_like(np_img)
-    for c in range(3):
-        sampled = ndi.map_coordinates(np_img[..., c], [y_m, x_m], order=1, mode="reflect")
-        channel = out[..., c]
-        channel[mask] = sampled[mask]
-        # leave outside radius black
-        out[..., c] = channel
-
-    out = np.clip(out, 0, 255).astype(np.uint8)
-    return Image.fromarray(out, mode="RGB")
+    return y_m, x_m, mask.astype(np.float32)
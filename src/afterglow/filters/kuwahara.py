@@ -1,49 +1,186 @@
 from __future__ import annotations
 
+import math
+from typing import Tuple
+
 import numpy as np
 from PIL import Image
 from scipy import ndimage as ndi
 
+from ._array import luminance, to_array, to_image
+from .resample import remap
+from .tracing import traced
+
+# smoothing of the structure tensor in anisotropic mode
+_TENSOR_SIGMA = 2.0
 
-def kuwahara(
+
+def kuwahara_image(
     image: Image.Image,
     radius: int = 4,
+    mode: str = "classic",
+    alpha: float = 1.0,
+    bins: int = 8,
 ) -> Image.Image:
     """Kuwahara filter for oil-paint-like smoothing while preserving edges.
+
+    - radius: quadrant size; each quadrant is (radius + 1) pixels square
+    - mode: "classic" (axis-aligned quadrants) or "anisotropic" (quadrants
+      stretched along the local edge direction)
+    - alpha: anisotropic mode only; lower values stretch more
+    - bins: anisotropic mode only; number of quantized orientations
+    """
+    return to_image(kuwahara_array(to_array(image), radius=radius, mode=mode, alpha=alpha, bins=bins))
+
+
+def kuwahara_array(
+    arr: np.ndarray,
+    radius: int = 4,
+    mode: str = "classic",
+    alpha: float = 1.0,
+    bins: int = 8,
+) -> np.ndarray:
+    """Array kernel for :func:`kuwahara_image` on a float32 HWC buffer in [0, 1].
+
+    Quadrant means and variances come from summed-area tables, so the cost
+    per pixel does not grow with ``radius``. The variance used to pick a
+    quadrant is summed over the three channels.
     """
-    src = image.convert("RGB")
-    arr = np.asarray(src).astype(np.float32)
+    if alpha <= 0:
+        raise ValueError(f"kuwahara alpha must be positive, got {alpha}")
+    r = max(1, int(radius))
+    if mode == "classic":
+        out = _classic(arr, r)
+    elif mode == "anisotropic":
+        out = _anisotropic(arr, r, alpha, max(1, int(bins)))
+    else:
+        raise ValueError(f"Unknown kuwahara mode: {mode}")
+    return np.clip(out, 0.0, 1.0, out=out)
+
+
+@traced("integral tables")
+def _integral(arr: np.ndarray) -> np.ndarray:
+    """Summed-area table of R, G, B and R^2 + G^2 + B^2, with a zero border.
+
+    ``S[y, x]`` is the sum over ``arr[:y, :x]``; float64 keeps large sums exact
+    enough for the variance.
+    """
+    h, w = arr.shape[:2]
+    table = np.zeros((h + 1, w + 1, 4), dtype=np.float64)
+    inner = table[1:, 1:]
+    inner[..., :3] = arr
+    np.einsum("ijc,ijc->ij", arr, arr, out=inner[..., 3], dtype=np.float64)
+    np.cumsum(inner, axis=0, out=inner)
+    np.cumsum(inner, axis=1, out=inner)
+    return table
 
+
+def _pick(stats: np.ndarray, count) -> np.ndarray:
+    """Mean of the lowest-variance quadrant from (..., 4 quadrants, 4) sums."""
+    stats = (stats / count).astype(np.float32)
+    means = stats[..., :3]
+    var = stats[..., 3] - np.einsum("...c,...c->...", means, means)
+    best = np.argmin(var, axis=-1)
+    return np.take_along_axis(means, best[..., None, None], axis=-2)[..., 0, :]
+
+
+def _classic(arr: np.ndarray, r: int) -> np.ndarray:
+    h, w = arr.shape[:2]
+    padded = np.pad(arr, ((r, r), (r, r), (0, 0)), mode="symmetric")
+    table = _integral(padded)
+    # sums of every (r+1)x(r+1) box, indexed by its top-left corner; the
+    # four quadrants of a pixel are boxes whose corners differ by r
+    s = r + 1
+    # one quadrant at a time, keeping the lowest variance so far and its
+    # mean; only the corner differences are float64, and share one buffer
+    diff = np.empty((h, w, 4), dtype=np.float64)
+    best_mean = best_var = None
+    for y, x in ((0, 0), (0, r), (r, 0), (r, r)):
+        np.subtract(table[y + s : y + s + h, x + s : x + s + w], table[y : y + h, x + s : x + s + w], out=diff)
+        diff -= table[y + s : y + s + h, x : x + w]
+        diff += table[y : y + h, x : x + w]
+        diff /= s * s
+        stats = diff.astype(np.float32)
+        means = stats[..., :3]
+        var = stats[..., 3] - np.einsum("...c,...c->...", means, means)
+        if best_var is None:
+            best_mean, best_var = np.ascontiguousarray(means), var
+            continue
+        # strict comparison keeps the first of equal quadrants, like argmin
+        better = var < best_var
+        np.copyto(best_var, var, where=better)
+        np.copyto(best_mean, means, where=better[..., None])
+    return best_mean
+
+
+@traced("orientation")
+def _orientation(arr: np.ndarray, r: int, alpha: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flow angle in [0, pi) and quadrant half-sizes along/across it."""
+    lum = luminance(arr)
+    gy, gx = np.gradient(lum)
+    e = ndi.gaussian_filter(gx * gx, _TENSOR_SIGMA)
+    f = ndi.gaussian_filter(gx * gy, _TENSOR_SIGMA)
+    g = ndi.gaussian_filter(gy * gy, _TENSOR_SIGMA)
+    root = np.sqrt((e - g) ** 2 + 4.0 * f * f)
+    anisotropy = root / (e + g + 1e-8)
+    # the gradient direction maximizes change; the flow runs across it
+    angle = np.mod(0.5 * np.arctan2(2.0 * f, e - g) + math.pi / 2.0, math.pi)
+    along = np.rint(r * (alpha + anisotropy) / alpha).astype(np.intp)
+    across = np.maximum(1, np.rint(r * alpha / (alpha + anisotropy))).astype(np.intp)
+    return angle, along, across
+
+
+def _anisotropic(arr: np.ndarray, r: int, alpha: float, bins: int) -> np.ndarray:
+    """Quadrants stretched along the local flow, one rotated table per bin.
+
+    Pixels are grouped by quantized flow angle. For each group the image is
+    resampled onto a grid rotated to that angle, where the stretched
+    quadrants are axis-aligned rectangles of per-pixel size, and their sums
+    are gathered from that grid's summed-area table.
+    """
     h, w = arr.shape[:2]
-    r = max(1, radius)
-
-    out = np.zeros_like(arr)
-
-    # four quadrant means and variances
-    def box_mean(img, size):
-        return ndi.uniform_filter(img, size=size, mode="reflect")
-
-    size = r
-    regions = []
-    for dy in (0, r):
-        for dx in (0, r):
-            patch = arr.copy()
-            # shift image by dx,dy and take box mean/variance
-            mean = box_mean(patch, size=(size, size, 1))
-            mean_sq = box_mean(patch * patch, size=(size, size, 1))
-            var = mean_sq - mean * mean
-            regions.append((mean, var))
-
-    # choose region with minimum variance per pixel
-    means = [m for m, _ in regions]
-    vars_ = [v for _, v in regions]
-    var_stack = np.stack(vars_, axis=-1).sum(axis=2)  # sum variances across channels
-    k = np.argmin(var_stack, axis=-1)
-
-    out = np.zeros_like(arr)
-    for i, mean in enumerate(means):
-        mask = (k == i)[..., None]
-        out = np.where(mask, mean, out)
-
-    out = np.clip(out, 0, 255).astype(np.uint8)
-    return Image.fromarray(out, mode="RGB")
+    angle, along, across = _orientation(arr, r, alpha)
+    which = np.rint(angle / (math.pi / bins)).astype(np.intp) % bins
+
+    margin = int(math.ceil(r * (alpha + 1.0) / alpha)) + 2
+    cx, cy = (w - 1) / 2.0, (h - 1) / 2.0
+    ys, xs = np.divmod(np.arange(h * w), w)
+
+    out = np.empty((h * w, 3), dtype=np.float32)
+    for b in range(bins):
+        sel = np.flatnonzero(which.ravel() == b)
+        if sel.size == 0:
+            continue
+        phi = b * math.pi / bins
+        c, s = np.float32(math.cos(phi)), np.float32(math.sin(phi))
+        # rotated grid covering the frame plus the longest quadrant: u runs
+        # along the flow (columns), v across it (rows)
+        half_u = int(math.ceil((w * abs(c) + h * abs(s)) / 2.0)) + margin
+        half_v = int(math.ceil((w * abs(s) + h * abs(c)) / 2.0)) + margin
+        gu = np.arange(-half_u, half_u + 1, dtype=np.float32)
+        gv = np.arange(-half_v, half_v + 1, dtype=np.float32)
+        map_x = cx + gu[None, :] * c - gv[:, None] * s
+        map_y = cy + gu[None, :] * s + gv[:, None] * c
+        table = _integral(remap(arr, map_y, map_x, order=1, mode="reflect"))
+        flat = table.reshape(-1, 4)
+        stride = table.shape[1]
+
+        dx, dy = xs[sel] - cx, ys[sel] - cy
+        iu = np.rint(dx * c + dy * s + half_u).astype(np.intp)
+        iv = np.rint(-dx * s + dy * c + half_v).astype(np.intp)
+        a, t = along.ravel()[sel], across.ravel()[sel]
+
+        quads = np.empty((sel.size, 4, 4), dtype=np.float64)
+        for q, (v0, v1, u0, u1) in enumerate(
+            ((iv - t, iv, iu - a, iu), (iv - t, iv, iu, iu + a), (iv, iv + t, iu - a, iu), (iv, iv + t, iu, iu + a))
+        ):
+            # inclusive rectangle [v0, v1] x [u0, u1] from four table corners
+            quads[:, q] = (
+                np.take(flat, (v1 + 1) * stride + (u1 + 1), axis=0)
+                - np.take(flat, v0 * stride + (u1 + 1), axis=0)
+                - np.take(flat, (v1 + 1) * stride + u0, axis=0)
+                + np.take(flat, v0 * stride + u0, axis=0)
+            )
+        count = ((t + 1) * (a + 1)).astype(np.float64)[:, None, None]
+        out[sel] = _pick(quads, count)
+    return out.reshape(h, w, 3)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+
+Maps = Tuple[np.ndarray, ...]
+
+# bump when a cached map's definition changes so stale disk entries are ignored
+_VERSION = 1
+
+
+class MapCache:
+    """LRU cache of content-independent coordinate maps.
+
+    Geometry filters build their sampling maps from the image size and
+    parameters alone, so a batch of same-sized frames can share them.
+
+    - max_bytes: in-memory budget; least recently used maps are dropped
+    - directory: optional on-disk store, one ``.npy`` per entry holding its
+      maps stacked, memory-mapped on load, so separate processes and later
+      runs can reuse them
+
+    All maps of one entry must share a shape and dtype.
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20, directory: Optional[Path] = None) -> None:
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory is not None else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Maps]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Maps]) -> Maps:
+        """Return the maps for ``key``, calling ``build`` on a miss.
+
+        Returned arrays are read-only; slice or copy them, don't write.
+        """
+        with self._lock:
+            maps = self._entries.get(key)
+            if maps is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return maps
+
+        maps = self._load(key)
+        if maps is None:
+            maps = tuple(np.ascontiguousarray(m) for m in build())
+            for m in maps:
+                m.setflags(write=False)
+            self._store(key, maps)
+
+        with self._lock:
+            self.misses += 1
+            self._insert(key, maps)
+        return maps
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (the disk store is left alone)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def _insert(self, key: Hashable, maps: Maps) -> None:
+        size = sum(m.nbytes for m in maps)
+        if key in self._entries or size > self.max_bytes:
+            return
+        self._entries[key] = maps
+        self._bytes += size
+        self._trim()
+
+    def _trim(self) -> None:
+        while self._bytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= sum(m.nbytes for m in old)
+
+    def _path(self, key: Hashable) -> Path:
+        assert self.directory is not None
+        digest = hashlib.sha1(repr((_VERSION, key)).encode()).hexdigest()
+        return self.directory / f"{digest}.npy"
+
+    def _load(self, key: Hashable) -> Optional[Maps]:
+        if self.directory is None:
+            return None
+        try:
+            stacked = np.load(self._path(key), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return tuple(stacked)
+
+    def _store(self, key: Hashable, maps: Maps) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # write then rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(suffix=".npy", dir=self.directory)
+        with os.fdopen(fd, "wb") as fh:
+            np.save(fh, np.stack(maps))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, self._path(key))
+
+
+MAP_CACHE = MapCache()
+
+
+def configure_map_cache(max_bytes: Optional[int] = None, directory: Optional[Path] = None) -> MapCache:
+    """Resize the shared cache and/or attach an on-disk store to it.
+
+    Safe to use as a process-pool initializer so workers share a directory.
+    """
+    if max_bytes is not None:
+        MAP_CACHE.max_bytes = max_bytes
+        with MAP_CACHE._lock:
+            MAP_CACHE._trim()
+    if directory is not None:
+        MAP_CACHE.directory = Path(directory)
+    return MAP_CACHE
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# threads a kernel splits its work across when the call doesn't say;
+# 1 keeps everything in the calling thread
+_WORKERS = 1
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_SIZE = 0
+# thread_map calls using each pool; a replaced pool is shut down once
+# its last user is done with it
+_USERS: Dict[ThreadPoolExecutor, int] = {}
+_POOL_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+# bands thinner than this cost more in overhead than they save
+_MIN_BAND_ROWS = 16
+
+
+def configure_workers(workers: Optional[int] = None) -> None:
+    """Set the default thread count for filters' per-channel/per-band work.
+
+    ``None`` or 0 means one thread per CPU. Threads come from one shared
+    pool; NumPy's large-array loops and SciPy's ndimage filters release the
+    GIL, so they run on several cores at once.
+    """
+    global _WORKERS
+    _WORKERS = max(1, workers or os.cpu_count() or 1)
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """Threads to use for a call passing ``workers`` (None: the default).
+
+    Work already running on the pool always gets 1, so nested kernels never
+    wait on the pool they occupy.
+    """
+    if getattr(_LOCAL, "inside", False):
+        return 1
+    return max(1, workers if workers is not None else _WORKERS)
+
+
+def thread_map(fn: Callable[[T], R], items: Iterable[T], workers: Optional[int] = None) -> List[R]:
+    """``[fn(item) for item in items]`` spread over the shared thread pool."""
+    items = list(items)
+    workers = min(resolve_workers(workers), len(items))
+    if workers <= 1:
+        return [fn(item) for item in items]
+
+    def run(item: T) -> R:
+        _LOCAL.inside = True
+        try:
+            return fn(item)
+        finally:
+            _LOCAL.inside = False
+
+    # each task runs in a copy of the caller's context (e.g. its trace spans)
+    with _executor(workers) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, run, item) for item in items]
+        return [f.result() for f in futures]
+
+
+def row_bands(rows: Optional[slice], h: int, workers: int) -> List[slice]:
+    """Split ``rows`` (None: all) of an ``h``-row frame into up to ``workers`` bands."""
+    y0, y1 = (0, h) if rows is None else rows.indices(h)[:2]
+    count = max(1, min(workers, (y1 - y0) // _MIN_BAND_ROWS))
+    edges = [y0 + (y1 - y0) * i // count for i in range(count + 1)]
+    return [slice(a, b) for a, b in zip(edges[:-1], edges[1:])]
+
+
+@contextmanager
+def _executor(workers: int) -> Iterator[ThreadPoolExecutor]:
+    """The shared pool, with at least ``workers`` threads, for the duration of a call.
+
+    The pool is sized once for the configured default (at least one thread
+    per CPU); a call asking for more gets a bigger pool for later calls
+    too, while calls still using the old one finish on it.
+    """
+    global _POOL, _POOL_SIZE
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_SIZE < workers:
+            old = _POOL
+            _POOL_SIZE = max(workers, _WORKERS, os.cpu_count() or 1)
+            _POOL = ThreadPoolExecutor(max_workers=_POOL_SIZE, thread_name_prefix="afterglow")
+            if old is not None and not _USERS.get(old):
+                _USERS.pop(old, None)
+                old.shutdown(wait=False)
+        pool = _POOL
+        _USERS[pool] = _USERS.get(pool, 0) + 1
+    try:
+        yield pool
+    finally:
+        with _POOL_LOCK:
+            _USERS[pool] -= 1
+            if pool is not _POOL and not _USERS[pool]:
+                del _USERS[pool]
+                pool.shutdown(wait=False)
+
+
+def _forget_pool() -> None:
+    # a forked child (e.g. a batch worker) inherits the pool object but
+    # none of its threads
+    global _POOL, _POOL_SIZE
+    _POOL = None
+    _POOL_SIZE = 0
+    _USERS.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pool)
@@ -7,6 +7,12 @@ import numpy as np
 from PIL import Image
 from scipy import ndimage as ndi
 
+from ._array import to_array, to_image
+from .mapcache import MAP_CACHE
+from .parallel import resolve_workers, row_bands, thread_map
+from .resample import remap
+from .tracing import span
+
 
 def _generate_value_noise(height: int, width: int, scale: float, octaves: int, seed: int) -> np.ndarray:
     rng = np.random.default_rng(seed)
@@ -33,26 +39,77 @@ def _generate_value_noise(height: int, width: int, scale: float, octaves: int, s
     return noise
 
 
-def perlin_warp(image: Image.Image, scale: float = 10.0, intensity: float = 12.0, octaves: int = 3, seed: int = 42) -> Image.Image:
+def perlin_warp_image(
+    image: Image.Image,
+    scale: float = 10.0,
+    intensity: float = 12.0,
+    octaves: int = 3,
+    seed: int = 42,
+    quality: str = "bilinear",
+) -> Image.Image:
     """Warp image coordinates using multi-octave value noise.
 
     This is not strict Perlin noise but similar enough for visual effect.
     """
-    src = image.convert("RGB")
-    np_img = np.asarray(src).astype(np.float32)
-    h, w = np_img.shape[:2]
+    out = perlin_warp_array(
+        to_array(image), scale=scale, intensity=intensity, octaves=octaves, seed=seed, quality=quality
+    )
+    return to_image(out)
+
+
+def perlin_warp_array(
+    arr: np.ndarray,
+    scale: float = 10.0,
+    intensity: float = 12.0,
+    octaves: int = 3,
+    seed: int = 42,
+    quality: str = "bilinear",
+    noise: Tuple[np.ndarray, np.ndarray] | None = None,
+    rows: slice | None = None,
+    workers: int | None = None,
+) -> np.ndarray:
+    """Array kernel for :func:`perlin_warp_image` on a float32 HWC buffer in [0, 1].
+
+    - quality: "nearest", "bilinear" or "bicubic" resampling
+    - noise: precomputed ``warp_noise`` fields, reused across calls
+    - rows: only render this band of output rows (sampling the whole input)
+    - workers: threads rendering row bands (default: :func:`configure_workers`)
+    """
+    h, w = arr.shape[:2]
+    if noise is None:
+        with span("noise generation"):
+            noise = warp_noise(h, w, scale=scale, octaves=octaves, seed=seed)
+    bands = row_bands(rows, h, resolve_workers(workers))
+    if len(bands) > 1:
+
+        def render(band: slice) -> np.ndarray:
+            return perlin_warp_array(arr, scale, intensity, octaves, seed, quality, noise=noise, rows=band)
 
-    noise_x = _generate_value_noise(h, w, scale=scale, octaves=octaves, seed=seed)
-    noise_y = _generate_value_noise(h, w, scale=scale * 1.3, octaves=octaves, seed=seed + 1)
+        return np.concatenate(thread_map(render, bands, len(bands)))
+    y0, y1 = (0, h) if rows is None else rows.indices(h)[:2]
+    noise_x, noise_y = noise[0][y0:y1], noise[1][y0:y1]
 
-    # build coordinate maps
-    yy, xx = np.meshgrid(np.arange(h), np.arange(w), indexing="ij")
-    map_y = yy + noise_y * intensity
-    map_x = xx + noise_x * intensity
+    # build float32 coordinate maps (the noise fields are float32)
+    map_y = noise_y * np.float32(intensity)
+    map_y += np.arange(y0, y1, dtype=np.float32)[:, None]
+    map_x = noise_x * np.float32(intensity)
+    map_x += np.arange(w, dtype=np.float32)
+
+    warped = remap(arr, map_y, map_x, order=quality, mode="reflect")
+    return np.clip(warped, 0.0, 1.0, out=warped)
+
+
+def warp_noise(height: int, width: int, scale: float = 10.0, octaves: int = 3, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """The (x, y) displacement fields :func:`perlin_warp_image` uses, in [-1, 1].
+
+    Fields are cached per size and parameters (read-only arrays).
+    """
+    key = ("perlin_warp", height, width, float(scale), int(octaves), int(seed))
+    noise_x, noise_y = MAP_CACHE.get(key, lambda: _warp_noise(height, width, scale, octaves, seed))
+    return noise_x, noise_y
 
-    warped = np.zeros_like(np_img)
-    for c in range(3):
-        warped[..., c] = ndi.map_coordinates(np_img[..., c], [map_y, map_x], order=1, mode="reflect")
 
-    warped = np.clip(warped, 0, 255).astype(np.uint8)
-    return Image.fromarray(warped, mode="RGB")
+def _warp_noise(height: int, width: int, scale: float, octaves: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    noise_x = _generate_value_noise(height, width, scale=scale, octaves=octaves, seed=seed)
+    noise_y = _generate_value_noise(height, width, scale=scale * 1.3, octaves=octaves, seed=seed + 1)
+    return noise_x, noise_y
@@ -1,77 +1,141 @@
 from __future__ import annotations
 
+import math
+
 import numpy as np
 from PIL import Image
 
+from ._array import to_array, to_image
+from .precision import as_float32
+
+_CHANNELS = {"red": 0, "green": 1, "blue": 2}
+
 
 def _luminance(arr: np.ndarray) -> np.ndarray:
     return 0.2126 * arr[..., 0] + 0.7152 * arr[..., 1] + 0.0722 * arr[..., 2]
 
 
-def pixel_sort(
+def pixel_sort_image(
     image: Image.Image,
     threshold: float = 0.7,
-    direction: str = "row",
+    direction: str | float = "row",
     reverse: bool = False,
+    key: str = "lum",
 ) -> Image.Image:
     """Sort pixels within bright segments along rows or columns.
 
     - threshold: luminance threshold [0..1] to include in segments
-    - direction: 'row' or 'col'
+    - direction: 'row', 'col', or an angle in degrees for slanted lines
     - reverse: reverse the sort order
+    - key: sort by 'lum', 'hue', 'saturation', 'red', 'green' or 'blue'
+    """
+    out = pixel_sort_array(to_array(image), threshold=threshold, direction=direction, reverse=reverse, key=key)
+    return to_image(out)
+
+
+def pixel_sort_array(
+    arr: np.ndarray,
+    threshold: float = 0.7,
+    direction: str | float = "row",
+    reverse: bool = False,
+    key: str = "lum",
+) -> np.ndarray:
+    """Array kernel for :func:`pixel_sort_image` on an HWC buffer of any precision.
+
+    Runs are labelled all at once and every segment is sorted by a single
+    ``argsort`` on a (segment id, key) composite instead of one per run.
+    Keys are computed in float32; the pixels move in the buffer's own dtype.
     """
-    src = image.convert("RGB")
-    arr = np.asarray(src).astype(np.uint8)
     h, w = arr.shape[:2]
+    levels = as_float32(arr)
+    lum = _luminance(levels)
+    values = _sort_key(levels, key, lum)
+    del levels
+    mask = lum > threshold
+    if not mask.any():
+        return arr.copy()
+
+    angle = _direction_angle(direction)
+    if angle in (0.0, 90.0):
+        # sort along axis 1 of a (lines, length) view; columns are transposed
+        transpose = angle == 90.0
+        lines_mask = mask.T if transpose else mask
+        lines_vals = values.T if transpose else values
+        starts = lines_mask.copy()
+        starts[:, 1:] &= ~lines_mask[:, :-1]
+        composite = _composite(starts, lines_mask, lines_vals, reverse)
+        perm = np.argsort(composite, axis=1)
+        # back to flat row-major pixel indices of the original image
+        n_lines, length = perm.shape
+        if transpose:
+            perm = (perm * w + np.arange(n_lines)[:, None]).T
+        else:
+            perm += (np.arange(n_lines) * length)[:, None]
+        positions = np.flatnonzero(mask)
+        out = arr.reshape(h * w, -1).copy()
+        out[positions] = arr.reshape(h * w, -1)[perm.ravel()[positions]]
+        return out.reshape(arr.shape)
+
+    # slanted: walk every pixel along parallel lines at the requested angle
+    a = math.radians(angle)
+    yy, xx = np.indices((h, w), dtype=np.float32)
+    along = (xx * math.cos(a) + yy * math.sin(a)).ravel()
+    across = np.rint(yy * math.cos(a) - xx * math.sin(a)).astype(np.int64).ravel()
+    order = np.lexsort((along, across))
+    line = across[order]
+    flat_mask = mask.ravel()[order]
+    starts = flat_mask.copy()
+    starts[1:] &= ~flat_mask[:-1] | (line[1:] != line[:-1])
+    composite = _composite(starts, flat_mask, values.ravel()[order], reverse)
+    perm = order[np.argsort(composite)]
+    out = arr.reshape(h * w, -1).copy()
+    out[order] = arr.reshape(h * w, -1)[perm]
+    return out.reshape(arr.shape)
+
+
+def _composite(starts: np.ndarray, mask: np.ndarray, values: np.ndarray, reverse: bool) -> np.ndarray:
+    """Single sort key: a run id per segment plus the value as a fraction.
+
+    Unmasked pixels each get a run of their own, so an ascending sort keeps
+    them in place and only permutes pixels within a masked segment. Run ids
+    increase along the traversal, so a float64 key orders everything at once.
+    """
+    run = np.cumsum(starts | ~mask, axis=-1, dtype=np.float64)
+    frac = np.clip(values, 0.0, 1.0) * 0.5
+    if reverse:
+        frac = 0.5 - frac
+    run += np.where(mask, frac, 0.0)
+    return run
+
+
+def _direction_angle(direction: str | float) -> float:
+    if isinstance(direction, str):
+        if direction == "col":
+            return 90.0
+        try:
+            direction = float(direction)
+        except ValueError:
+            return 0.0
+    angle = float(direction) % 180.0
+    return angle
+
 
-    lum = _luminance(arr.astype(np.float32) / 255.0)
-
-    out = arr.copy()
-
-    if direction not in {"row", "col"}:
-        direction = "row"
-
-    if direction == "row":
-        for y in range(h):
-            mask = lum[y, :] > threshold
-            if not mask.any():
-                continue
-            # find contiguous segments
-            x = 0
-            while x < w:
-                if not mask[x]:
-                    x += 1
-                    continue
-                start = x
-                while x < w and mask[x]:
-                    x += 1
-                end = x
-                # sort this segment by luminance or value
-                segment = out[y, start:end, :]
-                seg_lum = lum[y, start:end]
-                idx = np.argsort(seg_lum)
-                if reverse:
-                    idx = idx[::-1]
-                out[y, start:end, :] = segment[idx]
-    else:  # column-wise
-        for x in range(w):
-            mask = lum[:, x] > threshold
-            if not mask.any():
-                continue
-            y = 0
-            while y < h:
-                if not mask[y]:
-                    y += 1
-                    continue
-                start = y
-                while y < h and mask[y]:
-                    y += 1
-                end = y
-                segment = out[start:end, x, :]
-                seg_lum = lum[start:end, x]
-                idx = np.argsort(seg_lum)
-                if reverse:
-                    idx = idx[::-1]
-                out[start:end, x, :] = segment[idx]
-
-    return Image.fromarray(out, mode="RGB")
+def _sort_key(arr: np.ndarray, key: str, lum: np.ndarray) -> np.ndarray:
+    if key in _CHANNELS:
+        return arr[..., _CHANNELS[key]]
+    if key in {"hue", "saturation"}:
+        r, g, b = arr[..., 0], arr[..., 1], arr[..., 2]
+        hi = np.maximum(np.maximum(r, g), b)
+        chroma = hi - np.minimum(np.minimum(r, g), b)
+        if key == "saturation":
+            return chroma / np.maximum(hi, np.float32(1e-6))
+        # HSV hue in [0, 1), picking the sector by the dominant channel
+        inv = np.float32(1.0 / 6.0) / np.maximum(chroma, np.float32(1e-6))
+        hue = (b - r) * inv + np.float32(2.0 / 6.0)
+        hue = np.where(hi == b, (r - g) * inv + np.float32(4.0 / 6.0), hue)
+        reds = (g - b) * inv
+        reds[reds < 0] += 1.0
+        hue = np.where(hi == r, reds, hue)
+        hue[chroma <= 0] = 0.0
+        return hue
+    return lum
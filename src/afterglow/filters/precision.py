@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+
+# dtype chain results, cached steps and pixel-moving kernels use; kernels
+# that do arithmetic always compute in float32 (NumPy has no fast float16 math)
+PRECISIONS = ("float32", "float16", "uint8")
+
+# worst-case rounding, in [0, 1] units, of storing a buffer once: float16
+# half an ulp below 1.0 (2**-12, an eighth of an 8-bit step), uint8 half an
+# 8-bit level, like saving and reloading a PNG. This bounds the input each
+# kernel sees, not the result: kernels with thresholds or gain (halftone,
+# glow, pixel sort masks...) can turn it into much larger output changes
+ERROR_BOUND: Dict[str, float] = {"float32": 0.0, "float16": 2.0**-12, "uint8": 0.5 / 255.0}
+
+_PRECISION = "float32"
+
+
+def configure_precision(precision: str = "float32") -> None:
+    """Set the default buffer precision of chains (see :data:`PRECISIONS`).
+
+    "float16" halves and "uint8" quarters the memory of cached step outputs
+    and of the buffers kernels that only move pixels (glitch, chromatic
+    aberration, pixel sort, kaleidoscope) run on directly; that is where it
+    is faster too. Kernels that do arithmetic still compute in float32, and
+    neon switches to a lookup table. Each rounding is within
+    :data:`ERROR_BOUND`; the result can differ by more.
+    """
+    global _PRECISION
+    _PRECISION = _check(precision)
+
+
+def resolve_precision(precision: Optional[str] = None) -> str:
+    """Precision to use for a call passing ``precision`` (None: the default)."""
+    return _PRECISION if precision is None else _check(precision)
+
+
+def reduced(precision: Optional[str] = None) -> bool:
+    """Whether ``precision`` (None: the default) lets kernels approximate."""
+    return resolve_precision(precision) != "float32"
+
+
+def as_float32(arr: np.ndarray) -> np.ndarray:
+    """A buffer of any precision as float32 in [0, 1] (float32 ones unchanged)."""
+    if arr.dtype == np.uint8:
+        out = arr.astype(np.float32)
+        out *= np.float32(1.0 / 255.0)
+        return out
+    return arr if arr.dtype == np.float32 else arr.astype(np.float32)
+
+
+def to_precision(arr: np.ndarray, precision: Optional[str] = None) -> np.ndarray:
+    """``arr`` (any precision) stored at ``precision``; uint8 holds 0-255."""
+    precision = resolve_precision(precision)
+    if arr.dtype == precision:
+        return arr
+    if precision != "uint8":
+        return as_float32(arr).astype(precision, copy=False)
+    out = np.multiply(arr, 255.0, dtype=np.float32)
+    out += 0.5
+    np.clip(out, 0.0, 255.0, out=out)
+    return out.astype(np.uint8)
+
+
+def _check(precision: str) -> str:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (expected one of {', '.join(PRECISIONS)})")
+    return precision
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from typing import Optional
+
 import numpy as np
 from PIL import Image
-from scipy import ndimage as ndi
+
+from ._array import luminance, to_array, to_image
+from .gray_scott import GrayScott
+from .tracing import span
 
 
-def reaction_diffusion(
+def reaction_diffusion_image(
     image: Image.Image,
     steps: int = 600,
     feed: float = 0.055,
@@ -14,41 +20,102 @@ def reaction_diffusion(
     diff_b: float = 0.5,
     mix: float = 0.6,
     seed: int = 123,
+    sim_scale: float = 1.0,
 ) -> Image.Image:
     """Gray-Scott reaction-diffusion stylization mixed with original image.
 
     Uses Gray-Scott on a single channel and remaps to RGB.
     """
-    rng = np.random.default_rng(seed)
+    out = reaction_diffusion_array(
+        to_array(image),
+        steps=steps,
+        feed=feed,
+        kill=kill,
+        diff_a=diff_a,
+        diff_b=diff_b,
+        mix=mix,
+        seed=seed,
+        sim_scale=sim_scale,
+    )
+    return to_image(out)
 
-    src = image.convert("RGB")
-    arr = np.asarray(src).astype(np.float32) / 255.0
 
-    h, w = arr.shape[:2]
-    # start with a seed pattern from luminance
-    lum = 0.2126 * arr[..., 0] + 0.7152 * arr[..., 1] + 0.0722 * arr[..., 2]
+@dataclass
+class ReactionDiffusionState:
+    """Gray-Scott fields carried from one frame to the next.
 
-    A = np.ones((h, w), dtype=np.float32)
-    B = (lum > lum.mean()).astype(np.float32) * 0.1
-    B += rng.normal(0.0, 0.02, size=(h, w)).astype(np.float32)
-    B = np.clip(B, 0.0, 1.0)
+    Pass the same instance to :func:`reaction_diffusion_array` for every
+    frame; the first frame runs the full ``steps``, later ones continue the
+    pattern for ``warm_steps``, nudging B by ``inject`` toward the new
+    frame's seed so the pattern follows the footage.
+    """
+
+    warm_steps: int = 30
+    inject: float = 0.05
+    A: Optional[np.ndarray] = None
+    B: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        self.A = self.B = None
+
+
+def reaction_diffusion_array(
+    arr: np.ndarray,
+    steps: int = 600,
+    feed: float = 0.055,
+    kill: float = 0.062,
+    diff_a: float = 1.0,
+    diff_b: float = 0.5,
+    mix: float = 0.6,
+    seed: int = 123,
+    sim_scale: float = 1.0,
+    state: Optional[ReactionDiffusionState] = None,
+) -> np.ndarray:
+    """Array kernel for :func:`reaction_diffusion_image` on a float32 HWC buffer in [0, 1].
+
+    - sim_scale: simulate at this fraction of the resolution and upsample
+      the fields at the end (coarser pattern, ~1/scale^2 the cost)
+    - state: warm-start from the previous frame's A/B fields
+    """
+    h, w = arr.shape[:2]
+    sim_h, sim_w = h, w
+    if sim_scale != 1.0:
+        sim_h = max(2, int(round(h * sim_scale)))
+        sim_w = max(2, int(round(w * sim_scale)))
+    seed_b = _seed_pattern(_resize(luminance(arr), sim_h, sim_w), seed)
 
-    lap_kernel = np.array([[0.05, 0.2, 0.05], [0.2, -1.0, 0.2], [0.05, 0.2, 0.05]], dtype=np.float32)
+    if state is not None and state.B is not None and state.B.shape == (sim_h, sim_w):
+        A = state.A
+        B = state.B + state.inject * (seed_b - state.B)
+        steps = state.warm_steps
+    else:
+        A = np.ones((sim_h, sim_w), dtype=np.float32)
+        B = seed_b
 
-    for _ in range(steps):
-        lapA = ndi.convolve(A, lap_kernel, mode="reflect")
-        lapB = ndi.convolve(B, lap_kernel, mode="reflect")
-        reaction = A * (B * B)
-        A += diff_a * lapA - reaction + feed * (1 - A)
-        B += diff_b * lapB + reaction - (kill + feed) * B
-        A = np.clip(A, 0.0, 1.0)
-        B = np.clip(B, 0.0, 1.0)
+    with span("simulate", steps=steps):
+        sim = GrayScott(A, B, feed=feed, kill=kill, diff_a=diff_a, diff_b=diff_b).step(steps)
+    A, B = sim.A, sim.B
+    if state is not None:
+        state.A, state.B = A, B
 
     # map pattern to colors via a simple palette
-    pat = (B - A)
+    pat = _resize(B - A, h, w)
     pat = (pat - pat.min()) / (pat.max() - pat.min() + 1e-6)
     palette = np.stack([pat, np.sqrt(pat), 1.0 - pat], axis=-1)
 
-    out = np.clip(arr * (1.0 - mix) + palette * mix, 0.0, 1.0)
-    out = (out * 255.0).astype(np.uint8)
-    return Image.fromarray(out, mode="RGB")
+    return np.clip(arr * (1.0 - mix) + palette * mix, 0.0, 1.0)
+
+
+def _seed_pattern(lum: np.ndarray, seed: int) -> np.ndarray:
+    # start with a seed pattern from luminance
+    rng = np.random.default_rng(seed)
+    B = (lum > lum.mean()).astype(np.float32) * 0.1
+    B += rng.normal(0.0, 0.02, size=lum.shape).astype(np.float32)
+    return np.clip(B, 0.0, 1.0)
+
+
+def _resize(field: np.ndarray, h: int, w: int) -> np.ndarray:
+    if field.shape == (h, w):
+        return field
+    src = Image.fromarray(field.astype(np.float32), mode="F")
+    return np.asarray(src.resize((w, h), resample=Image.BILINEAR), dtype=np.float32)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+from .tracing import traced
+
+# quality name -> interpolation order
+QUALITY = {"nearest": 0, "bilinear": 1, "bicubic": 3}
+
+# border added around the source so every tap is a fixed offset from the
+# base index; wide enough for the 4x4 bicubic footprint after folding
+_PAD = 4
+
+_PAD_MODES = {"reflect": "symmetric", "nearest": "edge", "wrap": "wrap", "grid-constant": "constant"}
+
+
+@traced("resample")
+def remap(
+    src: np.ndarray,
+    map_y: np.ndarray,
+    map_x: np.ndarray,
+    order: int | str = 1,
+    mode: str = "reflect",
+    cval: float = 0.0,
+) -> np.ndarray:
+    """Sample ``src`` at (``map_y``, ``map_x``) for all channels in one pass.
+
+    Replaces per-channel ``ndi.map_coordinates`` calls: coordinates are
+    folded into range once, tap weights are computed once, and every gather
+    pulls whole pixels (all channels together) out of a padded copy of the
+    image, so each tap is a constant offset from one base index.
+
+    - src: HWC or HW array; uint8 input gives uint8 output
+    - order: 0/1/3 or "nearest"/"bilinear"/"bicubic" (Keys cubic, a=-0.5)
+    - mode: "reflect" (scipy's half-sample reflect), "nearest", "wrap" or
+      "grid-constant" (the image sits on an infinite ``cval`` grid, so
+      samples near the border blend with ``cval``, as scipy's
+      "grid-constant"; scipy's "constant" mode is not supported)
+    """
+    if isinstance(order, str):
+        if order not in QUALITY:
+            raise ValueError(f"Unknown resampling quality: {order}")
+        order = QUALITY[order]
+    if order not in (0, 1, 3):
+        raise ValueError(f"Unsupported interpolation order: {order}")
+    if mode not in _PAD_MODES:
+        raise ValueError(f"Unknown boundary mode: {mode}")
+
+    squeeze = src.ndim == 2
+    if squeeze:
+        src = src[..., None]
+    h, w, channels = src.shape
+    pad_kw = {"constant_values": cval} if mode == "grid-constant" else {}
+    padded = np.pad(src, ((_PAD, _PAD), (_PAD, _PAD), (0, 0)), mode=_PAD_MODES[mode], **pad_kw)
+    stride = w + 2 * _PAD
+    flat = padded.reshape(-1, channels)
+
+    y = _fold(map_y, h, mode)
+    x = _fold(map_x, w, mode)
+    if order == 0:
+        base = np.floor(y + 0.5).astype(np.intp)
+        base += _PAD
+        base *= stride
+        base += np.floor(x + 0.5).astype(np.intp)
+        base += _PAD
+        out = np.take(flat, base, axis=0)
+        return out[..., 0] if squeeze else out
+
+    y0 = np.floor(y)
+    x0 = np.floor(x)
+    fy = (y - y0).astype(np.float32)
+    fx = (x - x0).astype(np.float32)
+    base = y0.astype(np.intp)
+    base += _PAD
+    base *= stride
+    base += x0.astype(np.intp)
+    base += _PAD
+    del y, x, y0, x0
+
+    if order == 1:
+        out = _bilinear(flat, base, stride, fy, fx)
+    else:
+        out = _bicubic(flat, base, stride, fy, fx)
+
+    if src.dtype == np.uint8:
+        out += 0.5
+        np.clip(out, 0.0, 255.0, out=out)
+        out = out.astype(np.uint8)
+    return out[..., 0] if squeeze else out
+
+
+def _fold(coords: np.ndarray, n: int, mode: str) -> np.ndarray:
+    """Bring coordinates into the range the padded source covers.
+
+    Linear and cubic interpolation of a sequence that is mirror-symmetric
+    (or periodic) give mirror-symmetric (or periodic) results, so folding
+    the coordinate matches extending the image, as scipy does.
+    """
+    coords = np.asarray(coords)
+    if mode == "reflect":
+        lo, hi = -0.5, n - 0.5
+    elif mode == "wrap":
+        lo, hi = 0.0, float(n)
+    elif mode == "nearest":
+        # beyond one pixel out every tap reads the edge value anyway
+        return np.clip(coords, -1.0, float(n))
+    else:
+        # two pixels out, every tap already reads cval from the padding
+        return np.clip(coords, -2.0, float(n + 1))
+    if coords.size and coords.min() >= lo and coords.max() <= hi:
+        return coords
+    if mode == "wrap":
+        return np.mod(coords, n)
+    period = 2.0 * n
+    folded = np.mod(coords + 0.5, period) - 0.5
+    return np.where(folded > hi, period - 1.0 - folded, folded)
+
+
+def _bilinear(flat: np.ndarray, base: np.ndarray, stride: int, fy: np.ndarray, fx: np.ndarray) -> np.ndarray:
+    """Two lerps along x, one along y, all in place on gathered pixels."""
+    fx = fx[..., None]
+    top = np.take(flat, base, axis=0).astype(np.float32, copy=False)
+    right = np.take(flat, base + 1, axis=0).astype(np.float32, copy=False)
+    right -= top
+    right *= fx
+    top += right
+    base += stride
+    bottom = np.take(flat, base, axis=0).astype(np.float32, copy=False)
+    np.subtract(np.take(flat, base + 1, axis=0), bottom, out=right, dtype=np.float32)
+    right *= fx
+    bottom += right
+    bottom -= top
+    bottom *= fy[..., None]
+    top += bottom
+    return top
+
+
+def _cubic_weights(t: np.ndarray) -> List[np.ndarray]:
+    # Keys cubic convolution, a = -0.5 (Catmull-Rom)
+    t2 = t * t
+    t3 = t2 * t
+    return [
+        -0.5 * t3 + t2 - 0.5 * t,
+        1.5 * t3 - 2.5 * t2 + 1.0,
+        -1.5 * t3 + 2.0 * t2 + 0.5 * t,
+        0.5 * t3 - 0.5 * t2,
+    ]
+
+
+def _bicubic(flat: np.ndarray, base: np.ndarray, stride: int, fy: np.ndarray, fx: np.ndarray) -> np.ndarray:
+    wy = _cubic_weights(fy)
+    wx = [w[..., None] for w in _cubic_weights(fx)]
+    out = np.zeros(base.shape + (flat.shape[1],), dtype=np.float32)
+    row = np.empty_like(out)
+    for dy, weight_y in zip((-1, 0, 1, 2), wy):
+        row.fill(0.0)
+        for dx, weight_x in zip((-1, 0, 1, 2), wx):
+            row += np.take(flat, base + (dy * stride + dx), axis=0) * weight_x
+        row *= weight_y[..., None]
+        out += row
+    return out
+
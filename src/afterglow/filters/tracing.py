@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+# names of the spans enclosing the current code, outermost first; a context
+# variable so work handed to the thread pool nests under its caller
+_PATH: ContextVar[Tuple[str, ...]] = ContextVar("afterglow_span_path", default=())
+
+_ACTIVE: Optional["Tracer"] = None
+F = TypeVar("F", bound=Callable[..., Any])
+_NULL = nullcontext()
+
+
+@dataclass
+class Span:
+    path: Tuple[str, ...]
+    start: float
+    seconds: float
+    thread: int
+    peak_bytes: Optional[int] = None
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.path[-1]
+
+
+class Tracer:
+    """Collects timed spans reported by filters and the chain runner.
+
+    Activate it with :func:`tracing`; code reports spans with :func:`span`,
+    which costs next to nothing while no tracer is active.
+
+    - memory: also record each span's peak traced allocation (tracemalloc;
+      slows NumPy-heavy code noticeably, and peaks are process-wide, so
+      spans running in parallel share them)
+    """
+
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory
+        self.spans: List[Span] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._peaks = threading.local()
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        path = _PATH.get() + (name,)
+        token = _PATH.set(path)
+        base = self._enter_memory() if self.memory else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            _PATH.reset(token)
+            peak = self._exit_memory(base) if base is not None else None
+            record = Span(path, start - self._origin, seconds, threading.get_ident(), peak, args)
+            with self._lock:
+                self.spans.append(record)
+
+    def summary(self) -> List[Tuple[Tuple[str, ...], int, float, Optional[int]]]:
+        """``(path, calls, seconds, peak_bytes)`` per span path, in start order."""
+        rows: Dict[Tuple[str, ...], List[Any]] = {}
+        for s in sorted(self.spans, key=lambda s: s.start):
+            row = rows.setdefault(s.path, [0, 0.0, None])
+            row[0] += 1
+            row[1] += s.seconds
+            if s.peak_bytes is not None:
+                row[2] = max(row[2] or 0, s.peak_bytes)
+        # a parent starts before its children, so this lists stages as a tree
+        return [(p, *row) for p, row in rows.items()]
+
+    def table(self) -> str:
+        """Per-stage timing (and allocation) table, stages indented under steps.
+
+        Seconds are summed over calls, so stages that ran on several threads
+        at once can add up to more than their step.
+        """
+        total = sum(s.seconds for s in self.spans if len(s.path) == 1) or 1e-9
+        header = f"{'stage':<36} {'calls':>5} {'seconds':>9} {'%':>6}"
+        lines = [header + (f" {'peak MB':>9}" if self.memory else "")]
+        for path, calls, seconds, peak in self.summary():
+            label = "  " * (len(path) - 1) + path[-1]
+            line = f"{label:<36} {calls:5d} {seconds:9.3f} {100.0 * seconds / total:6.1f}"
+            if self.memory:
+                line += f" {peak / 2**20:9.1f}" if peak is not None else f" {'':>9}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The spans as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+        events = []
+        for s in self.spans:
+            args = {k: v if isinstance(v, (int, float, str, bool)) else repr(v) for k, v in s.args.items()}
+            if s.peak_bytes is not None:
+                args["peak_bytes"] = s.peak_bytes
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": "/".join(s.path[:-1]) or "step",
+                    "ph": "X",
+                    "ts": s.start * 1e6,
+                    "dur": s.seconds * 1e6,
+                    "pid": 1,
+                    "tid": s.thread,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()) + "\n")
+
+    def _enter_memory(self) -> int:
+        # tracemalloc has one peak; spans save the enclosing span's running
+        # peak, reset it for themselves, and fold theirs back in on exit
+        stack = self._peak_stack()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1] = max(stack[-1], peak)
+        tracemalloc.reset_peak()
+        stack.append(current)
+        return current
+
+    def _exit_memory(self, base: int) -> int:
+        stack = self._peak_stack()
+        own = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+        if stack:
+            stack[-1] = max(stack[-1], own)
+        return own - base
+
+    def _peak_stack(self) -> List[int]:
+        if not hasattr(self._peaks, "stack"):
+            self._peaks.stack = []
+        return self._peaks.stack
+
+
+def span(name: str, **args: Any) -> ContextManager[None]:
+    """Time the enclosed block as ``name`` if a tracer is active."""
+    tracer = _ACTIVE
+    if tracer is None:
+        return _NULL
+    return tracer.span(name, **args)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator reporting every call of the function as a span ``name``."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _ACTIVE is None:
+                return fn(*args, **kwargs)
+            with _ACTIVE.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+@contextmanager
+def tracing(tracer: Optional[Tracer] = None) -> Iterator[Tracer]:
+    """Activate ``tracer`` (or a new one) for every thread until exit."""
+    global _ACTIVE
+    tracer = tracer or Tracer()
+    previous = _ACTIVE
+    started = tracer.memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _ACTIVE = tracer
+    try:
+        yield tracer
+    finally:
+        _ACTIVE = previous
+        if started:
+            tracemalloc.stop()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from afterglow.filters._array import to_array, to_image
+from afterglow.filters.precision import as_float32
+
+# float32 HWC buffers, read memory-mapped and written without quantizing
+ARRAY_SUFFIXES = {".npy"}
+
+
+def is_array_path(path: Path) -> bool:
+    return Path(path).suffix.lower() in ARRAY_SUFFIXES
+
+
+def open_image(path: Path, scale: Optional[float] = None, resample: bool = True) -> Image.Image:
+    """Open an image, optionally at ``scale`` (0-1] of its size.
+
+    A scaled JPEG is decoded at 1/2, 1/4 or 1/8 size in the DCT domain
+    (PIL draft mode) and only the rest is resampled, so a small proxy of a
+    big photo costs a fraction of the full decode in time and memory.
+
+    - resample: bring the image to exactly ``scale``; otherwise only JPEGs
+      shrink, to the smallest draft size at least that big
+    """
+    image = Image.open(path)
+    if scale is not None and scale < 1.0:
+        size = scaled_size(image.size, scale)
+        if image.format == "JPEG":
+            image.draft("RGB", size)
+        if resample:
+            image = downscale(image, size)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+    return image
+
+
+def save_image(image: Image.Image, output: Path) -> None:
+    output.parent.mkdir(parents=True, exist_ok=True)
+    image.save(output)
+
+
+def image_size(path: Path) -> Tuple[int, int]:
+    """``(width, height)`` of an image or array file, from its header."""
+    if is_array_path(path):
+        shape = np.load(path, mmap_mode="r").shape
+        return shape[1], shape[0]
+    with Image.open(path) as image:
+        return image.size
+
+
+def scaled_size(size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def downscale(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    if image.size == tuple(size):
+        return image
+    return image.resize(size, resample=Image.LANCZOS, reducing_gap=2.0)
+
+
+def load_array(path: Union[Path, BinaryIO]) -> np.ndarray:
+    """A ``.npy`` image (a path or an open binary file) as a float32 HWC buffer in [0, 1].
+
+    float32 RGB files at a path are memory-mapped (read-only, nothing copied
+    until a kernel reads it); uint8 ones are scaled from 0-255, gray ones
+    get three channels and alpha is dropped, as for image files.
+    """
+    arr = np.load(path, mmap_mode="r" if isinstance(path, (str, os.PathLike)) else None)
+    if arr.ndim == 2:
+        arr = np.repeat(arr[..., None], 3, axis=-1)
+    if arr.ndim != 3 or arr.shape[2] not in (3, 4):
+        raise ValueError(f"Expected an HxW, HxWx3 or HxWx4 array in {path}, got shape {arr.shape}")
+    arr = arr[..., :3]
+    if arr.dtype == np.uint8:
+        out = arr.astype(np.float32)
+        out /= 255.0
+        return out
+    return arr if arr.dtype == np.float32 else arr.astype(np.float32)
+
+
+def save_array(arr: np.ndarray, output: Path) -> None:
+    """Write an HWC buffer of any precision as float32 ``.npy``, unquantized."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    np.save(output, as_float32(np.asarray(arr)))
+
+
+def read_array(path: Path, scale: Optional[float] = None, resample: bool = True) -> np.ndarray:
+    """The float32 HWC buffer of an image or ``.npy`` file, optionally at ``scale`` of its size.
+
+    - resample: as for :func:`open_image`; without it ``.npy`` files are
+      read at full size
+    """
+    if not is_array_path(path):
+        return to_array(open_image(path, scale, resample))
+    arr = load_array(path)
+    if scale is None or scale >= 1.0 or not resample:
+        return arr
+    return downscale_array(arr, scale)
+
+
+def write_array(arr: np.ndarray, output: Path) -> None:
+    """Save an HWC buffer as ``.npy`` or, quantized, as an image file."""
+    if is_array_path(output):
+        save_array(arr, output)
+    else:
+        save_image(to_image(arr), output)
+
+
+def downscale_array(arr: np.ndarray, scale: float) -> np.ndarray:
+    """``arr`` resampled to ``scale`` of its size (quantized to 8 bits on the way)."""
+    h, w = arr.shape[:2]
+    size = scaled_size((w, h), scale)
+    return arr if size == (w, h) else to_array(downscale(to_image(arr), size))
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from afterglow import filters
+from afterglow.filters._array import to_array, to_image
+from afterglow.filters.precision import as_float32, resolve_precision, to_precision
+from afterglow.filters.tracing import span
+from afterglow.io import image_size, read_array
+from afterglow.registry import Kernel, Step, get_filter, kernel_filter, scale_step, tile_spec
+from afterglow.tiling import bind_params, run_tiled
+
+if TYPE_CHECKING:
+    from afterglow.stepcache import StepCache
+
+# a chain step as written: "name:key=value,..." or a mapping like
+# {"filter": "glow", "radii": [6, 20, 60]} from a pipeline file
+StepSpec = Union[str, Mapping[str, Any]]
+
+
+def parse_step(step: StepSpec) -> Tuple[str, Dict[str, Any]]:
+    """Split a step spec into a name and raw (untyped) params."""
+    if not isinstance(step, str):
+        params = dict(step)
+        name = params.pop("filter", None)
+        if not isinstance(name, str):
+            raise ValueError(f"Pipeline step needs a 'filter' name: {step!r}")
+        return name.strip().lower(), params
+    name, _, raw = step.partition(":")
+    params: Dict[str, Any] = {}
+    for item in raw.split(","):
+        if not item:
+            continue
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value in step {step!r}, got {item!r}")
+        params[key.strip()] = value.strip()
+    return name.strip().lower(), params
+
+
+def resolve_step(name: str, params: Dict[str, Any]) -> List[Step]:
+    """Map a chain step name and params onto one or more array kernels."""
+    return get_filter(name).steps(params)
+
+
+def build_steps(specs: Sequence[StepSpec]) -> List[Step]:
+    """Parse and validate step specs into kernels, failing on the first bad one."""
+    steps: List[Step] = []
+    for spec in specs:
+        name, params = parse_step(spec)
+        steps.extend(resolve_step(name, params))
+    return steps
+
+
+def load_pipeline(path: Path) -> List[StepSpec]:
+    """Read the steps of a JSON or YAML pipeline file (YAML needs PyYAML).
+
+    The file holds a list of steps, or a mapping with a ``steps`` list; each
+    step is a spec string or a mapping with a ``filter`` name and params::
+
+        {"steps": ["halftone:cell=8", {"filter": "glow", "radii": [6, 20, 60]}]}
+    """
+    text = path.read_text()
+    if path.suffix.lower() in {".yaml", ".yml"}:
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"Reading {path.name} needs PyYAML (pip install pyyaml)") from None
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("steps")
+    if not isinstance(data, list) or not all(isinstance(s, (str, dict)) for s in data):
+        raise ValueError(f"{path.name}: expected a list of steps")
+    return data
+
+
+def with_state(steps: Sequence[Step]) -> List[Step]:
+    """Give every simulation step its own warm-start state object.
+
+    Running the returned steps frame after frame carries each simulation
+    over instead of restarting it (see :class:`FlowPaintState`).
+    """
+    out: List[Step] = []
+    for kernel, params in steps:
+        spec = kernel_filter(kernel)
+        if spec is not None and spec.state is not None and "state" not in params:
+            params = {**params, "state": getattr(filters, spec.state)()}
+        out.append((kernel, params))
+    return out
+
+
+def is_stateful(steps: Sequence[Step]) -> bool:
+    return any("state" in params for _, params in steps)
+
+
+def run_array(
+    arr: np.ndarray,
+    steps: Sequence[Step],
+    max_memory: Optional[int] = None,
+    cache: Optional[StepCache] = None,
+) -> np.ndarray:
+    """Run kernels back to back on one buffer; at float32 nothing is quantized in between.
+
+    The result, cached step outputs and the input of kernels registered
+    with ``any_precision`` have the dtype set by
+    :func:`~afterglow.filters.precision.configure_precision`; other kernels
+    run on float32, and hand float32 straight to the next such kernel.
+
+    - max_memory: per-step working-set budget in bytes; steps that would
+      exceed it run tile by tile (see :mod:`afterglow.tiling`)
+    - cache: step outputs are looked up and stored here; the chain resumes
+      after the last step with a cached output (the result may be read-only)
+    """
+    precision = resolve_precision()
+    # rounding to a reduced precision only pays where the buffer is kept or
+    # moved as it is; arithmetic kernels would convert it back to float32
+    native = [_any_precision(kernel) for kernel, _ in steps] + [True]
+    if cache is not None or native[0]:
+        arr = to_precision(arr, precision)
+    keys: List[Optional[str]] = [None] * len(steps)
+    start = 0
+    if cache is not None:
+        with span("cache lookup"):
+            keys = cache.keys(arr, steps)
+            for i in reversed(range(len(steps))):
+                hit = cache.get(keys[i]) if keys[i] is not None else None
+                if hit is not None:
+                    arr, start = hit, i + 1
+                    break
+    for i in range(start, len(steps)):
+        (kernel, params), key = steps[i], keys[i]
+        with span(step_name(kernel)):
+            if not native[i]:
+                arr = as_float32(arr)
+            if max_memory is None:
+                arr = kernel(arr, **params)
+            else:
+                arr = run_tiled(arr, kernel, params, max_memory, tile_spec(kernel))
+            if key is not None or native[i + 1]:
+                arr = to_precision(arr, precision)
+        if key is not None:
+            with span("cache store"):
+                cache.put(key, arr)
+    return arr
+
+
+def _any_precision(kernel: Kernel) -> bool:
+    spec = kernel_filter(kernel)
+    return spec is not None and spec.any_precision
+
+
+def step_name(kernel: Kernel) -> str:
+    """Display name of a chain step's kernel, e.g. ``bloom`` for ``bloom_array``."""
+    name = getattr(kernel, "__name__", repr(kernel))
+    return name[: -len("_array")] if name.endswith("_array") else name
+
+
+def run_chain(
+    image: Image.Image,
+    steps: Sequence[Step],
+    max_memory: Optional[int] = None,
+    cache: Optional[StepCache] = None,
+) -> Image.Image:
+    """Convert once, run every step on one buffer, convert back once."""
+    with span("to_array"):
+        arr = to_array(image)
+    arr = run_array(arr, steps, max_memory=max_memory, cache=cache)
+    with span("to_image"):
+        return to_image(arr)
+
+
+def preview_steps(steps: Sequence[Step], scale: float) -> List[Step]:
+    """``steps`` with pixel-unit params rescaled for a proxy at ``scale`` of the size."""
+    return [scale_step(step, scale) for step in steps]
+
+
+def reduced_input(steps: Sequence[Step], size: Tuple[int, int]) -> Tuple[float, List[Step]]:
+    """Scale a ``size`` input can be decoded at for these steps, and the steps to run on it.
+
+    Below 1 only when the first step shrinks its input anyway (see
+    ``FilterSpec.reduce_input``), e.g. ASCII art needs a few pixels per
+    character, not the whole photo.
+    """
+    steps = list(steps)
+    spec = kernel_filter(steps[0][0]) if steps else None
+    if spec is None or spec.reduce_input is None:
+        return 1.0, steps
+    kernel, params = steps[0]
+    scale, extra = spec.reduce_input(bind_params(kernel, params), size)
+    if scale >= 1.0:
+        return 1.0, steps
+    return scale, [(kernel, {**params, **extra})] + steps[1:]
+
+
+def read_input(path: Path, steps: Sequence[Step]) -> Tuple[np.ndarray, List[Step]]:
+    """Decode ``path`` for ``steps``, at reduced size if :func:`reduced_input` allows.
+
+    Returns the float32 buffer and the steps to run on it.
+    """
+    scale, steps = reduced_input(steps, image_size(path))
+    return read_array(path, scale, resample=False), steps
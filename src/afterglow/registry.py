@@ -0,0 +1,619 @@
+from __future__ import annotations
+
+import inspect
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from afterglow import filters
+from afterglow.tiling import Params, TileSpec, bind_params, iter_tiles
+
+Kernel = Callable[..., np.ndarray]
+Step = Tuple[Kernel, Dict[str, Any]]
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+
+@dataclass(frozen=True)
+class Param:
+    """One typed parameter of a registered filter.
+
+    - name: name in step specs, pipeline files and listings
+    - type: "int", "float", "bool", "str" or "floats" (a list, written
+      ``6/20/60`` in step specs)
+    - arg: kernel keyword it is passed as (default: ``name``)
+    - aliases: other accepted names
+    - choices: allowed values of a "str" parameter
+    - low, high: inclusive bounds of a numeric parameter
+    - pixels: a length in pixels, rescaled for renders at another size
+      (see :func:`scale_step`)
+    """
+
+    name: str
+    type: str = "float"
+    arg: Optional[str] = None
+    aliases: Tuple[str, ...] = ()
+    choices: Tuple[str, ...] = ()
+    low: Optional[float] = None
+    high: Optional[float] = None
+    help: str = ""
+    pixels: bool = False
+
+    @property
+    def kwarg(self) -> str:
+        return self.arg or self.name
+
+    def scaled(self, value: Any, factor: float) -> Any:
+        """A pixel length ``value`` for an image ``factor`` times the size, kept in bounds."""
+        if isinstance(value, (list, tuple)):
+            return [self.scaled(v, factor) for v in value]
+        value = value * factor
+        if self.low is not None:
+            value = max(value, self.low)
+        return int(round(value)) if self.type == "int" else float(value)
+
+    def convert(self, value: Any) -> Any:
+        """``value`` (a spec string or a decoded JSON/YAML value) as this type."""
+        try:
+            value = _CONVERTERS[self.type](value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {self.type} for {self.name}: {value!r}") from None
+        if self.choices and value not in self.choices:
+            raise ValueError(f"Invalid {self.name}: {value!r} (expected one of {', '.join(self.choices)})")
+        for v in value if isinstance(value, list) else [value]:
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                if (self.low is not None and v < self.low) or (self.high is not None and v > self.high):
+                    raise ValueError(f"{self.name} must be in [{_bound(self.low)}, {_bound(self.high)}], got {v}")
+        return value
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE | _FALSE:
+            return text in _TRUE
+        raise ValueError(value)
+    return bool(value)
+
+
+def _to_int(value: Any) -> int:
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(value)
+    return int(number)
+
+
+def _to_floats(value: Any) -> List[float]:
+    items = value.split("/") if isinstance(value, str) else list(value)
+    return [float(v) for v in items if v != ""]
+
+
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "int": _to_int,
+    "float": float,
+    "bool": _to_bool,
+    "str": str,
+    "floats": _to_floats,
+}
+
+
+def _bound(value: Optional[float]) -> str:
+    return "inf" if value is None else f"{value:g}"
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """A filter as chain steps, pipeline files and commands see it.
+
+    - name: canonical step name
+    - kernel: array kernel in :mod:`afterglow.filters`
+    - params: the parameters steps may set; unset ones keep the kernel's
+      defaults
+    - aliases: other accepted step names
+    - cost: rough single-core seconds per megapixel, given the kernel's
+      params with defaults filled in
+    - tile: how the kernel splits under a memory budget (None: always
+      whole-frame)
+    - state: warm-start state class in :mod:`afterglow.filters`, for
+      simulations that carry over from frame to frame
+    - plan: turns the kernel params into ``(filter name, params)`` steps,
+      for filters that pick another kernel or add one by parameter
+    - deterministic: whether the output depends only on the input and
+      params (cacheable), given the kernel's bound params
+    - reduce_input: for kernels that shrink their input anyway, the scale
+      it can be decoded at and the params to add for that, given the bound
+      params and the full ``(width, height)``
+    - any_precision: the kernel only moves or resamples pixels, so it takes
+      and returns buffers of every :data:`~afterglow.filters.precision.PRECISIONS`
+      dtype as they are; other kernels get float32 copies (see
+      :func:`~afterglow.pipeline.run_array`)
+    """
+
+    name: str
+    kernel: str
+    params: Tuple[Param, ...] = ()
+    aliases: Tuple[str, ...] = ()
+    help: str = ""
+    cost: Callable[[Params], float] = lambda p: 0.05
+    tile: Optional[TileSpec] = None
+    state: Optional[str] = None
+    plan: Optional[Callable[[Params], List[Tuple[str, Params]]]] = None
+    deterministic: Callable[[Params], bool] = lambda p: True
+    reduce_input: Optional[Callable[[Params, Tuple[int, int]], Tuple[float, Params]]] = None
+    any_precision: bool = False
+
+    def load(self) -> Kernel:
+        return getattr(filters, self.kernel)
+
+    def parse(self, raw: Mapping[str, Any]) -> Params:
+        """Validate step params by name or alias into kernel keyword arguments.
+
+        ``None`` values are dropped, leaving the kernel's default.
+        """
+        lookup = {_key(alias): p for p in self.params for alias in (p.name, *p.aliases)}
+        out: Params = {}
+        for key, value in raw.items():
+            param = lookup.get(_key(key))
+            if param is None:
+                expected = ", ".join(p.name for p in self.params) or "none"
+                raise ValueError(f"Unknown parameter for {self.name}: {key} (expected: {expected})")
+            if value is not None:
+                out[param.kwarg] = param.convert(value)
+        return out
+
+    def steps(self, raw: Mapping[str, Any]) -> List[Step]:
+        """The ``(kernel, params)`` steps running this filter with ``raw`` params."""
+        params = self.parse(raw)
+        if self.plan is None:
+            return [(self.load(), params)]
+        return [(get_filter(name).load(), p) for name, p in self.plan(params)]
+
+    def defaults(self) -> Dict[str, Any]:
+        """Kernel defaults of the declared params, by param name (imports the kernel)."""
+        signature = inspect.signature(self.load()).parameters
+        return {
+            p.name: signature[p.kwarg].default
+            for p in self.params
+            if p.kwarg in signature and signature[p.kwarg].default is not inspect.Parameter.empty
+        }
+
+
+FILTERS: Dict[str, FilterSpec] = {}
+_ALIASES: Dict[str, str] = {}
+_KERNELS: Dict[str, str] = {}
+
+
+def _key(name: str) -> str:
+    return name.strip().lower().replace("-", "_")
+
+
+def register(spec: FilterSpec) -> FilterSpec:
+    """Add a filter to the registry, making it available as a chain step."""
+    names = [_key(n) for n in (spec.name, *spec.aliases)]
+    taken = [n for n in names if n in _ALIASES]
+    if taken:
+        raise ValueError(f"Filter name already registered: {', '.join(taken)}")
+    FILTERS[spec.name] = spec
+    _ALIASES.update(dict.fromkeys(names, spec.name))
+    _KERNELS.setdefault(spec.kernel, spec.name)
+    return spec
+
+
+def get_filter(name: str) -> FilterSpec:
+    """The registered filter called ``name`` (or one of its aliases)."""
+    canonical = _ALIASES.get(_key(name))
+    if canonical is None:
+        raise ValueError(f"Unknown step: {name}")
+    return FILTERS[canonical]
+
+
+def kernel_filter(kernel: Kernel) -> Optional[FilterSpec]:
+    """The registered filter whose array kernel is ``kernel``, if any."""
+    name = _KERNELS.get(getattr(kernel, "__name__", ""))
+    return FILTERS[name] if name is not None else None
+
+
+def tile_spec(kernel: Kernel) -> Optional[TileSpec]:
+    spec = kernel_filter(kernel)
+    return spec.tile if spec is not None else None
+
+
+def estimate_seconds(steps: Sequence[Step], megapixels: float) -> List[float]:
+    """Rough single-core seconds of each step on a ``megapixels`` frame (0 if unknown)."""
+    out = []
+    for kernel, params in steps:
+        spec = kernel_filter(kernel)
+        out.append(spec.cost(bind_params(kernel, params)) * megapixels if spec is not None else 0.0)
+    return out
+
+
+def scale_step(step: Step, factor: float) -> Step:
+    """``step`` for the same picture rendered ``factor`` times the size.
+
+    Params declared in pixels are rescaled, kernel defaults included, so a
+    render on a downscaled proxy looks like the full-size one.
+    """
+    kernel, params = step
+    spec = kernel_filter(kernel)
+    if spec is None or factor == 1.0:
+        return step
+    args = bind_params(kernel, params)
+    out = dict(params)
+    for param in spec.params:
+        if param.pixels and args.get(param.kwarg) is not None:
+            out[param.kwarg] = param.scaled(args[param.kwarg], factor)
+    return kernel, out
+
+
+def _gauss_halo(sigma: float) -> int:
+    # scipy truncates gaussians at 4 sigma
+    return int(math.ceil(4.0 * float(sigma))) + 1
+
+
+def _blur_align(radii) -> int:
+    from afterglow.filters.blur import pyramid_factor
+
+    return max(pyramid_factor(r) for r in radii)
+
+
+def _blur_halo(radii) -> int:
+    # the widest blur's gaussian plus a coarse pixel each for the box
+    # downsampling and the upsample, on the pyramid's sampling grid
+    align = _blur_align(radii)
+    halo = max(_gauss_halo(r) for r in radii) + 2 * align
+    return -(-halo // align) * align
+
+
+def _glow_radii(p: Params) -> Sequence[float]:
+    from afterglow.filters.bloom import glow_radii
+
+    return glow_radii(p["radius"], p["radii"])
+
+
+def _bloom_prepare(arr: np.ndarray, p: Params, tile: int) -> Params:
+    from afterglow.filters.bloom import bloom_glow
+
+    halo = _blur_halo(_glow_radii(p))
+    glow_max = 0.0
+    for outer, inner in iter_tiles(arr.shape[:2], tile, tile, halo):
+        glow = bloom_glow(arr[outer], threshold=p["threshold"], radius=p["radius"], radii=p["radii"])
+        glow_max = max(glow_max, float(glow[inner].max()))
+    return {"glow_max": glow_max}
+
+
+def _neon_prepare(arr: np.ndarray, p: Params, tile: int) -> Params:
+    from afterglow.filters.neon_edges import edge_magnitude
+
+    lo, hi = np.inf, -np.inf
+    for outer, inner in iter_tiles(arr.shape[:2], tile, tile, 2):
+        mag = edge_magnitude(arr[outer])[inner]
+        lo, hi = min(lo, float(mag.min())), max(hi, float(mag.max()))
+    return {"mag_range": (lo, hi)}
+
+
+def _perlin_prepare(arr: np.ndarray, p: Params, tile: int) -> Params:
+    from afterglow.filters.perlin_warp import warp_noise
+
+    h, w = arr.shape[:2]
+    return {"noise": warp_noise(h, w, scale=p["scale"], octaves=p["octaves"], seed=p["seed"])}
+
+
+def _ascii_reduce(p: Params, size: Tuple[int, int]) -> Tuple[float, Params]:
+    # cells average 8+ source pixels across either way; keep the full-size grid
+    return min(1.0, 8.0 * p["cols"] / size[0]), {"source_size": tuple(size)}
+
+
+def _halftone_plan(p: Params) -> List[Tuple[str, Params]]:
+    if not p.pop("cmyk", False):
+        return [("halftone", p)]
+    if "angle" in p:
+        raise ValueError("halftone: cmyk screens take angles=C/M/Y/K, not angle")
+    return [("halftone_cmyk", p)]
+
+
+def _glitch_plan(p: Params) -> List[Tuple[str, Params]]:
+    # "shift" puts a chromatic aberration in front of the scanline glitch
+    shift = p.pop("shift_pixels", None)
+    head = [("aberration", {"shift_pixels": shift})] if shift is not None else []
+    return head + [("glitch", p)]
+
+
+_QUALITY = Param("quality", "str", choices=("nearest", "bilinear", "bicubic"), help="Resampling quality")
+
+register(
+    FilterSpec(
+        "halftone",
+        "halftone_dots_array",
+        params=(
+            Param(
+                "cell", "int", arg="cell_size", aliases=("cell_size",), low=1, help="Cell size in pixels", pixels=True
+            ),
+            Param("contrast", help="Contrast multiplier for dot sizing"),
+            Param("angle", help="Screen angle in degrees"),
+            Param("antialias", "bool", help="Soft anti-aliased dot edges"),
+            Param("cmyk", "bool", help="Four-color CMYK screens at print angles (see halftone_cmyk)"),
+        ),
+        help="Black dots on a grid, sized by darkness",
+        cost=lambda p: 0.04,
+        # big dots spill past their cell, so carry one aligned cell of context;
+        # rotated screens are anchored to the frame origin and can't be split
+        tile=TileSpec(
+            "tile",
+            halo=lambda p: int(p["cell_size"]) if p["angle"] % 360.0 == 0.0 else None,
+            bytes_per_pixel=48,
+            align=lambda p: int(p["cell_size"]),
+        ),
+        plan=_halftone_plan,
+    )
+)
+register(
+    FilterSpec(
+        "halftone_cmyk",
+        "halftone_cmyk_array",
+        params=(
+            Param(
+                "cell", "int", arg="cell_size", aliases=("cell_size",), low=1, help="Cell size in pixels", pixels=True
+            ),
+            Param("contrast", help="Contrast multiplier for dot sizing"),
+            Param("angles", "floats", help="C/M/Y/K screen angles in degrees"),
+            Param("antialias", "bool", help="Soft anti-aliased dot edges"),
+        ),
+        aliases=("cmyk",),
+        help="Four rotated CMYK dot screens",
+        cost=lambda p: 0.6,
+    )
+)
+register(
+    FilterSpec(
+        "perlin_warp",
+        "perlin_warp_array",
+        params=(
+            Param("scale", low=1e-3, help="Noise scale (larger = smoother)"),
+            Param("intensity", help="Pixel displacement in px", pixels=True),
+            Param("octaves", "int", low=1, help="Noise octaves for texture"),
+            Param("seed", "int", help="Random seed"),
+            _QUALITY,
+        ),
+        aliases=("warp",),
+        help="Displace pixels along fractal noise",
+        cost=lambda p: 0.16,
+        tile=TileSpec("rows", bytes_per_pixel=64, prepare=_perlin_prepare),
+    )
+)
+register(
+    FilterSpec(
+        "kaleidoscope",
+        "kaleidoscope_array",
+        params=(
+            Param("slices", "int", low=2, help="Number of mirrored slices"),
+            Param("radius", low=0.0, help="Relative radius [0-1]"),
+            _QUALITY,
+        ),
+        aliases=("kale",),
+        help="Mirror a wedge around the center",
+        cost=lambda p: 0.11,
+        tile=TileSpec("rows", bytes_per_pixel=120),
+        any_precision=True,
+    )
+)
+register(
+    FilterSpec(
+        "aberration",
+        "chromatic_aberration_array",
+        params=(
+            Param(
+                "shift",
+                "int",
+                arg="shift_pixels",
+                aliases=("shift_pixels",),
+                help="Channel offset in pixels",
+                pixels=True,
+            ),
+        ),
+        aliases=("chromatic_aberration", "ca"),
+        help="Offset the red and blue channels sideways",
+        cost=lambda p: 0.01,
+        tile=TileSpec("band", bytes_per_pixel=24),
+        any_precision=True,
+    )
+)
+register(
+    FilterSpec(
+        "glitch",
+        "scanline_glitch_array",
+        params=(
+            Param(
+                "shift", "int", arg="shift_pixels", help="Chromatic aberration first, by this many pixels", pixels=True
+            ),
+            Param(
+                "line_shift",
+                "int",
+                arg="line_shift_px",
+                aliases=("line_shift_px",),
+                help="Horizontal shift range",
+                pixels=True,
+            ),
+            Param(
+                "prob",
+                arg="line_probability",
+                aliases=("line_probability",),
+                low=0.0,
+                high=1.0,
+                help="Probability a line (or block) gets shifted",
+            ),
+            Param("seed", "int", help="Random seed"),
+            Param("mode", "str", choices=("scanline", "block", "datamosh"), help="What slides: rows or blocks"),
+            Param("block", "int", low=1, help="Block size for block/datamosh modes", pixels=True),
+        ),
+        aliases=("scanline", "scanline_glitch"),
+        help="Rows or blocks slid sideways, optionally after chromatic aberration",
+        cost=lambda p: 0.005,
+        plan=_glitch_plan,
+        deterministic=lambda p: p["seed"] is not None,
+        any_precision=True,
+    )
+)
+# pyramid blurs sample on a grid of their downsampling factor, so tiles
+# and halos stay on that grid to reproduce the whole-frame result
+register(
+    FilterSpec(
+        "glow",
+        "bloom_array",
+        params=(
+            Param("threshold", low=0.0, high=1.0, help="Luminance threshold (0..1)"),
+            Param("strength", low=0.0, help="Blend amount (0..1)"),
+            Param("radius", "int", low=0, help="Blur radius (px)", pixels=True),
+            Param("radii", "floats", low=0.0, help="Several radii blended together, e.g. 6/20/60", pixels=True),
+        ),
+        aliases=("bloom",),
+        help="Blurred highlights added back on top",
+        cost=lambda p: 0.09,
+        tile=TileSpec(
+            "tile",
+            halo=lambda p: _blur_halo(_glow_radii(p)),
+            bytes_per_pixel=80,
+            align=lambda p: _blur_align(_glow_radii(p)),
+            prepare=_bloom_prepare,
+        ),
+    )
+)
+register(
+    FilterSpec(
+        "pixel_sort",
+        "pixel_sort_array",
+        params=(
+            Param("threshold", low=0.0, high=1.0, help="Luminance threshold (0..1)"),
+            Param("direction", "str", help="row, col, or an angle in degrees"),
+            Param("reverse", "bool", help="Reverse sort order"),
+            Param("key", "str", choices=("lum", "hue", "saturation", "red", "green", "blue"), help="Sort key"),
+        ),
+        aliases=("sort",),
+        help="Sort bright runs of pixels along rows, columns or slanted lines",
+        cost=lambda p: 0.05,
+        # only row sorts stay within a band; columns and slanted lines cross them
+        tile=TileSpec("band", halo=lambda p: 0 if p["direction"] == "row" else None, bytes_per_pixel=64),
+        any_precision=True,
+    )
+)
+register(
+    FilterSpec(
+        "flow_paint",
+        "flow_paint_array",
+        params=(
+            Param("steps", "int", low=0, help="Number of advection steps", pixels=True),
+            Param("stride", "int", low=1, help="Sampling stride", pixels=True),
+            Param("jitter", help="Noise added to vectors"),
+            Param("blur", low=0.0, help="Blur for gradients", pixels=True),
+            Param("seed", "int", help="Random seed"),
+            Param("pickup", low=0.0, high=1.0, help="How fast strokes take on the color beneath them"),
+            Param("soften", low=0.0, help="Blur applied once to the finished strokes", pixels=True),
+            Param("max_seconds", low=0.0, help="Stop early after this many seconds"),
+        ),
+        aliases=("flow",),
+        help="Brush strokes advected along image gradients",
+        cost=lambda p: 0.2 + 0.0125 * p["steps"],
+        state="FlowPaintState",
+        # a time budget stops wherever the clock says
+        deterministic=lambda p: p["max_seconds"] is None,
+    )
+)
+register(
+    FilterSpec(
+        "reaction_diffusion",
+        "reaction_diffusion_array",
+        params=(
+            Param("steps", "int", low=0, help="Simulation steps"),
+            Param("feed", help="Feed rate"),
+            Param("kill", help="Kill rate"),
+            Param("diff_a", low=0.0, help="Diffusion rate of A"),
+            Param("diff_b", low=0.0, help="Diffusion rate of B"),
+            Param("mix", low=0.0, high=1.0, help="Blend with original"),
+            Param("seed", "int", help="Random seed"),
+            Param("sim_scale", low=0.01, help="Simulate at this fraction of the resolution"),
+        ),
+        aliases=("react_diff", "rd"),
+        help="Gray-Scott patterns grown from the image",
+        cost=lambda p: 0.02 + 0.023 * p["steps"] * p["sim_scale"] ** 2,
+        state="ReactionDiffusionState",
+    )
+)
+register(
+    FilterSpec(
+        "ascii",
+        "ascii_art_array",
+        params=(
+            Param("cols", "int", low=1, help="Characters across"),
+            Param("charset", "str", help="Characters from dark to light"),
+            Param("invert", "bool", help="Invert brightness mapping"),
+            Param("font_size", "int", low=1, help="Glyph size in pixels"),
+            Param("color", "bool", help="Color each character from its source cell"),
+        ),
+        aliases=("ascii_art",),
+        help="Render as a grid of characters",
+        cost=lambda p: 0.02,
+        reduce_input=_ascii_reduce,
+    )
+)
+register(
+    FilterSpec(
+        "crt",
+        "crt_tube_array",
+        params=(
+            Param("scanline_strength", low=0.0, high=1.0, help="Darkening of alternate rows"),
+            Param("vignette", low=0.0, help="Edge darkening"),
+            Param("curvature", help="Barrel distortion of the tube"),
+            Param("mask_strength", low=0.0, high=1.0, help="RGB shadow-mask strength"),
+            _QUALITY,
+        ),
+        aliases=("crt_tube",),
+        help="Curved tube, scanlines and shadow mask",
+        cost=lambda p: 0.12,
+        tile=TileSpec("rows", bytes_per_pixel=120),
+    )
+)
+register(
+    FilterSpec(
+        "kuwahara",
+        "kuwahara_array",
+        params=(
+            Param("radius", "int", low=1, help="Neighborhood radius", pixels=True),
+            Param("mode", "str", choices=("classic", "anisotropic"), help="anisotropic strokes follow edges"),
+            Param("alpha", low=1e-3, help="Anisotropic stretch; lower stretches more"),
+            Param("bins", "int", low=1, help="Anisotropic orientation bins"),
+        ),
+        aliases=("oilpaint",),
+        help="Oil-paint smoothing that keeps edges",
+        cost=lambda p: 0.4 if p["mode"] == "classic" else 1.0 + 0.39 * p["bins"],
+        # anisotropic quadrants are sampled on rotated grids anchored to the
+        # frame, which a tile can't reproduce
+        tile=TileSpec(
+            "tile",
+            halo=lambda p: max(1, int(p["radius"])) + 1 if p["mode"] == "classic" else None,
+            bytes_per_pixel=130,
+        ),
+    )
+)
+register(
+    FilterSpec(
+        "neon",
+        "neon_edges_array",
+        params=(
+            Param("strength", low=0.0, help="Edge brightness"),
+            Param("glow_radius", low=0.0, help="Glow blur radius (px)", pixels=True),
+            Param("hue_shift", help="Hue rotation of the edge colors"),
+        ),
+        aliases=("neon_edges",),
+        help="Edges lit with a hue-cycling neon glow",
+        cost=lambda p: 0.17,
+        tile=TileSpec(
+            "tile",
+            halo=lambda p: _blur_halo([p["glow_radius"]]) + 2 * _blur_align([p["glow_radius"]]),
+            bytes_per_pixel=96,
+            align=lambda p: _blur_align([p["glow_radius"]]),
+            prepare=_neon_prepare,
+        ),
+    )
+)
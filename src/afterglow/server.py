@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import base64
+import io
+import ipaddress
+import itertools
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from PIL import Image
+
+from afterglow import filters
+from afterglow.client import parse_address
+from afterglow.filters.mapcache import configure_map_cache
+from afterglow.filters._array import to_array, to_image
+from afterglow.filters.precision import as_float32
+from afterglow.io import ARRAY_SUFFIXES, load_array, open_image, write_array
+from afterglow.pipeline import build_steps, read_input, run_array
+
+# finished jobs kept around for status queries
+_HISTORY = 1000
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    payload: Dict[str, Any]
+    state: str = "queued"  # queued, running, done, failed
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def status(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"id": self.id, "state": self.state}
+        if self.error:
+            out["error"] = self.error
+        out.update(self.result or {})
+        return out
+
+
+def _warm(map_cache: Optional[Path]) -> None:
+    # pay every filter's imports once per worker instead of once per job
+    for name in filters.__all__:
+        getattr(filters, name)
+    if map_cache is not None:
+        configure_map_cache(directory=map_cache)
+
+
+def run_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one job in a worker: decode, run the steps, save or encode."""
+    start = time.perf_counter()
+    steps = build_steps(payload["steps"])
+    if "input_data" in payload:
+        data = io.BytesIO(base64.b64decode(payload["input_data"]))
+        arr = load_array(data) if data.getvalue().startswith(b"\x93NUMPY") else to_array(open_image(data))
+    else:
+        arr, steps = read_input(Path(payload["input"]), steps)
+    result = run_array(arr, steps, max_memory=payload.get("max_memory"))
+    out: Dict[str, Any] = {}
+    if payload.get("output"):
+        write_array(result, Path(payload["output"]))
+        out["output"] = payload["output"]
+    else:
+        buf = io.BytesIO()
+        fmt = _output_format(payload.get("format"))
+        if fmt == "NPY":
+            np.save(buf, as_float32(result))
+        else:
+            to_image(result).save(buf, format=fmt)
+        out["output_data"] = base64.b64encode(buf.getvalue()).decode("ascii")
+    out["seconds"] = round(time.perf_counter() - start, 4)
+    return out
+
+
+def _output_format(name: Optional[str]) -> str:
+    """PIL format name (or "NPY") for a ``format`` like ``png`` or ``.jpg``; raises ValueError."""
+    name = str(name or "png").lower()
+    ext = name if name.startswith(".") else "." + name
+    if ext in ARRAY_SUFFIXES:
+        return "NPY"
+    fmt = Image.registered_extensions().get(ext)
+    if fmt is None and name.upper() in Image.SAVE:
+        fmt = name.upper()
+    if fmt is None or fmt not in Image.SAVE:
+        raise ValueError(f"Unsupported output format: {name}")
+    return fmt
+
+
+class JobServer:
+    """Warm worker processes plus the job table behind ``afterglow serve``.
+
+    - workers: worker processes, each importing every filter at start-up
+      and keeping its coordinate-map cache across jobs
+    - max_queue: jobs allowed to wait for a free worker; more are refused
+    - max_memory: per-step working-set budget of every job
+    - map_cache: directory where workers share cached coordinate maps
+    - root: directory job ``input`` and ``output`` paths must resolve
+      inside (relative ones are taken from it); None allows any path
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: int = 64,
+        max_memory: Optional[int] = None,
+        map_cache: Optional[Path] = None,
+        root: Optional[Path] = None,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.max_memory = max_memory
+        self.map_cache = map_cache
+        self.root = None if root is None else Path(root).resolve()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # jobs go to the pool only when a worker is free, so this is the queue
+        self._queue: "deque[Job]" = deque()
+        self._running = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pool = self._start_pool()
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm, initargs=(self.map_cache,))
+        # start the workers now rather than on the first job
+        for _ in range(self.workers):
+            pool.submit(int)
+        return pool
+
+    def submit(self, payload: Dict[str, Any]) -> Job:
+        """Validate and queue a job; raises ValueError or :class:`QueueFull`.
+
+        The payload holds ``steps`` (chain step specs), ``input`` (a path)
+        or ``input_data`` (base64 image or ``.npy`` bytes), and ``output``
+        (a path) or ``format`` (an image format or ``npy``, returned as
+        base64 ``output_data``).
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a JSON object")
+        steps = payload.get("steps")
+        if not isinstance(steps, list) or not steps:
+            raise ValueError("Job needs a non-empty 'steps' list")
+        build_steps(steps)
+        work = {k: payload[k] for k in ("steps", "input", "input_data", "output", "format") if k in payload}
+        if "input_data" not in payload:
+            if not payload.get("input") or not self._path(payload["input"]).is_file():
+                raise ValueError(f"No such input: {payload.get('input')}")
+            work["input"] = str(self._path(payload["input"]))
+        if payload.get("output"):
+            work["output"] = str(self._path(payload["output"]))
+        else:
+            _output_format(payload.get("format"))
+        work["max_memory"] = self.max_memory
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                raise QueueFull(f"Queue full ({len(self._queue)} jobs waiting)")
+            job = Job(str(next(self._ids)), work)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._forget_finished()
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": len(self._queue),
+                "running": self._running,
+                "max_queue": self.max_queue,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for job in self._queue:
+                job.state, job.error = "failed", "Cancelled"
+                job.done.set()
+            self._queue.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _path(self, value: Any) -> Path:
+        """A job's file path, resolved; raises ValueError outside :attr:`root`."""
+        path = (Path(str(value)) if self.root is None else self.root / str(value)).resolve()
+        if self.root is not None and not path.is_relative_to(self.root):
+            raise ValueError(f"Path outside the server root {self.root}: {value}")
+        return path
+
+    def _dispatch(self) -> None:
+        started = []
+        with self._lock:
+            while self._queue and self._running < self.workers:
+                job = self._queue.popleft()
+                try:
+                    future = self._pool.submit(run_job, job.payload)
+                except BrokenProcessPool:
+                    self._replace_pool(self._pool)
+                    future = self._pool.submit(run_job, job.payload)
+                job.state = "running"
+                self._running += 1
+                started.append((job, self._pool, future))
+        for job, pool, future in started:
+            future.add_done_callback(partial(self._finish, job, pool))
+
+    def _finish(self, job: Job, pool: ProcessPoolExecutor, future: Future) -> None:
+        try:
+            job.result = future.result()
+        except CancelledError:
+            job.error = "Cancelled"
+        except BrokenProcessPool:
+            # a worker died (e.g. killed for memory); later jobs get a new pool
+            job.error = "Worker process died"
+            with self._lock:
+                if self._pool is pool:
+                    self._replace_pool(pool)
+        except Exception as exc:  # report it in the job, keep serving
+            job.error = f"{type(exc).__name__}: {exc}"
+        job.state = "failed" if job.error else "done"
+        job.payload = {}  # may hold the uploaded image
+        job.done.set()
+        with self._lock:
+            self._running -= 1
+        self._dispatch()
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._start_pool()
+
+    def _forget_finished(self) -> None:
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= _HISTORY:
+                break
+            if self._jobs[job_id].done.is_set():
+                del self._jobs[job_id]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON job API.
+
+    - ``POST /jobs``: queue a job (see :meth:`JobServer.submit`); with
+      ``"wait": true`` the reply comes when it finishes
+    - ``GET /jobs/<id>``: job status; ``?wait=1`` blocks until it finishes
+    - ``GET /health``: pool size and queue depth
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        jobs: JobServer = self.server.jobs  # type: ignore[attr-defined]
+        if url.path == "/health":
+            return self._send(200, jobs.health())
+        if url.path.startswith("/jobs/"):
+            job = jobs.get(url.path[len("/jobs/") :])
+            if job is None:
+                return self._send(404, {"error": "No such job"})
+            if "wait" in parse_qs(url.query):
+                job.done.wait()
+            return self._send(200, job.status())
+        self._send(404, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != "/jobs":
+            return self._send(404, {"error": "Not found"})
+        jobs: JobServer = self.server.jobs  # type: ignore[attr-defined]
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+            job = jobs.submit(payload)
+        except QueueFull as exc:
+            return self._send(503, {"error": str(exc)})
+        except ValueError as exc:
+            return self._send(400, {"error": str(exc)})
+        if payload.get("wait"):
+            job.done.wait()
+            self._send(200, job.status())
+            # nobody polls a job they waited for; don't keep its image
+            if job.result is not None:
+                job.result.pop("output_data", None)
+            return
+        self._send(202, job.status())
+
+    def _send(self, code: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(jobs: JobServer, address: str, allow_remote: bool = False) -> None:
+    """Answer job requests on ``address`` (``host:port`` or ``unix:/path``) until interrupted.
+
+    Jobs read and write files as this user, so a TCP ``host`` other
+    machines can reach raises ValueError unless ``allow_remote`` is set.
+    """
+    kind, target = parse_address(address)
+    if kind == "tcp" and not allow_remote and not _is_loopback(target[0]):
+        raise ValueError(f"Other machines can reach {target[0]}; serve there only with --allow-remote")
+    if kind == "unix":
+        path = Path(target)
+        if path.exists():
+            _claim_socket(path)
+        httpd: socketserver.BaseServer = _UnixHTTPServer(str(path), _Handler)
+    else:
+        httpd = ThreadingHTTPServer(target, _Handler)
+    httpd.jobs = jobs  # type: ignore[attr-defined]
+    # stop the same way on SIGTERM as on Ctrl-C: workers down, socket removed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        jobs.close()
+        if kind == "unix":
+            Path(target).unlink(missing_ok=True)
+
+
+def _claim_socket(path: Path) -> None:
+    # a socket file nobody answers on is left over from a killed server
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+        return
+    finally:
+        probe.close()
+    raise ValueError(f"Already serving on {path}")
+
+
+def _is_loopback(host: str) -> bool:
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except socket.gaierror:
+        return False
+    # scoped IPv6 addresses carry a %zone suffix
+    return all(ipaddress.ip_address(info[4][0].partition("%")[0]).is_loopback for info in infos)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from afterglow.registry import Kernel, Step, kernel_filter
+from afterglow.tiling import bind_params
+
+# bump when a kernel's output for the same params changes so stale disk
+# entries are ignored
+_VERSION = 1
+
+# params that don't change a kernel's output
+_IGNORED = {"workers"}
+
+
+class StepCache:
+    """Content-addressed LRU cache of chain step outputs.
+
+    A step's key hashes its input's key with the filter's kernel and its
+    params (defaults filled in); the first step's input key hashes the
+    pixels. Re-running a chain whose early steps are unchanged resumes from
+    the last step whose output is cached (see :func:`run_array`).
+
+    - max_bytes: in-memory budget; least recently used outputs are dropped
+    - directory: optional on-disk store, one ``.npy`` per output (in the
+      chain's precision, which the keys include via the input's dtype),
+      memory-mapped on load, so later runs (and other processes) reuse it
+    - max_disk_bytes: disk budget; least recently used files are deleted
+      (None: unbounded)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 1 << 30,
+        directory: Optional[Path] = None,
+        max_disk_bytes: Optional[int] = 4 << 30,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def keys(self, arr: np.ndarray, steps: Sequence[Step]) -> List[Optional[str]]:
+        """Cache key of each step's output when the chain runs on ``arr``.
+
+        Keys stop (None) from the first step that can't be cached: one
+        carrying warm-start state, or whose registry entry says its params
+        make it non-deterministic (e.g. no seed, a time budget).
+        """
+        key: Optional[str] = _digest(("input", arr.shape, arr.dtype.str), arr)
+        out: List[Optional[str]] = []
+        for kernel, params in steps:
+            if key is not None:
+                key = _step_key(key, kernel, params)
+            out.append(key)
+        return out
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """The cached output for ``key`` (read-only), or None."""
+        with self._lock:
+            arr = self._entries.get(key)
+            if arr is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return arr
+        arr = self._load(key)
+        with self._lock:
+            if arr is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._insert(key, arr)
+        return arr
+
+    def put(self, key: str, arr: np.ndarray) -> None:
+        """Store ``arr`` as the output for ``key``; it is made read-only."""
+        arr.setflags(write=False)
+        self._store(key, arr)
+        with self._lock:
+            self._insert(key, arr)
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (the disk store is left alone)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def _insert(self, key: str, arr: np.ndarray) -> None:
+        if key in self._entries or arr.nbytes > self.max_bytes:
+            return
+        self._entries[key] = arr
+        self._bytes += arr.nbytes
+        while self._bytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.nbytes
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{key}.npy"
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            arr = np.load(path, mmap_mode="r")
+            os.utime(path)  # recency for the disk budget
+        except (OSError, ValueError):
+            return None
+        return arr
+
+    def _store(self, key: str, arr: np.ndarray) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # write then rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(suffix=".npy", dir=self.directory)
+        with os.fdopen(fd, "wb") as fh:
+            np.save(fh, arr)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, self._path(key))
+        if self.max_disk_bytes is not None:
+            self._prune()
+
+    def _prune(self) -> None:
+        assert self.directory is not None
+        files = []
+        for path in self.directory.glob("*.npy"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda f: f[0]):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def _step_key(previous: str, kernel: Kernel, params: Dict[str, Any]) -> Optional[str]:
+    if "state" in params:
+        return None
+    spec = kernel_filter(kernel)
+    args = bind_params(kernel, params)
+    if spec is not None and not spec.deterministic(args):
+        return None
+    normalized = {k: _plain(v) for k, v in sorted(args.items()) if k not in _IGNORED}
+    name = getattr(kernel, "__module__", "") + "." + getattr(kernel, "__name__", repr(kernel))
+    return _digest((previous, name, normalized))
+
+
+def _plain(value: Any) -> Any:
+    # params as JSON-stable values: tuples and arrays become lists
+    if isinstance(value, np.ndarray):
+        return ["ndarray", value.shape, value.dtype.str, _digest((), value)]
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _digest(meta: Any, data: Optional[np.ndarray] = None) -> str:
+    h = hashlib.sha1(json.dumps([_VERSION, meta], default=repr).encode())
+    if data is not None:
+        h.update(np.ascontiguousarray(data))
+    return h.hexdigest()
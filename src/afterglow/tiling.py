@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import inspect
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from afterglow.filters.tracing import span
+
+Params = Dict[str, Any]
+
+# smallest tile edge worth running; below this the halo dominates
+MIN_TILE = 64
+
+
+@dataclass(frozen=True)
+class TileSpec:
+    """How a kernel can be split up under a memory budget.
+
+    - mode: "tile" (2D tiles with a halo), "band" (full-width row bands with
+      a halo) or "rows" (kernel renders ``rows=slice`` of the output while
+      sampling the whole input; for geometric remaps)
+    - halo: pixels of context each side needs, or None if the params make
+      the kernel non-local (it then runs on the whole frame)
+    - bytes_per_pixel: rough peak working set per processed pixel
+    - align: tile origins/sizes are kept multiples of this
+    - prepare: whole-frame values (e.g. normalization) computed up front,
+      in tiles, and passed to every tile call as extra params
+    """
+
+    mode: str
+    halo: Callable[[Params], Optional[int]] = lambda p: 0
+    bytes_per_pixel: int = 64
+    align: Callable[[Params], int] = lambda p: 1
+    prepare: Optional[Callable[[np.ndarray, Params, int], Params]] = None
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte size such as ``512M``, ``2G`` or ``1500000``."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    raw = text.strip().upper().rstrip("B").rstrip("I")
+    if raw and raw[-1] in units:
+        return int(float(raw[:-1]) * units[raw[-1]])
+    return int(float(raw))
+
+
+def iter_tiles(
+    shape: Tuple[int, int], tile_h: int, tile_w: int, halo: int
+) -> Iterator[Tuple[Tuple[slice, slice], Tuple[slice, slice]]]:
+    """Yield ``(outer, inner)`` slice pairs covering an image of ``shape``.
+
+    ``outer`` is the tile plus halo in image coordinates, ``inner`` the
+    tile's own pixels relative to ``outer``.
+    """
+    h, w = shape
+    for y in range(0, h, tile_h):
+        for x in range(0, w, tile_w):
+            y1, x1 = min(y + tile_h, h), min(x + tile_w, w)
+            oy0, ox0 = max(0, y - halo), max(0, x - halo)
+            oy1, ox1 = min(h, y1 + halo), min(w, x1 + halo)
+            outer = (slice(oy0, oy1), slice(ox0, ox1))
+            inner = (slice(y - oy0, y1 - oy0), slice(x - ox0, x1 - ox0))
+            yield outer, inner
+
+
+def bind_params(kernel: Callable[..., np.ndarray], params: Params) -> Params:
+    """``params`` with the kernel's defaults filled in for everything else."""
+    bound = inspect.signature(kernel).bind(None, **params)
+    bound.apply_defaults()
+    args = dict(bound.arguments)
+    args.pop(next(iter(args)))
+    return args
+
+
+def _round_down(value: int, align: int) -> int:
+    return max(align, value - value % align)
+
+
+def run_tiled(
+    arr: np.ndarray,
+    kernel: Callable[..., np.ndarray],
+    params: Params,
+    max_memory: int,
+    spec: Optional[TileSpec] = None,
+) -> np.ndarray:
+    """Run ``kernel`` on ``arr`` keeping its working set under ``max_memory``.
+
+    The budget covers per-tile temporaries; the input and output frames
+    themselves are always held in full. Kernels without a :class:`TileSpec`
+    (``spec``, usually the registry's), or whose params make them non-local,
+    run on the whole frame.
+    """
+    h, w = arr.shape[:2]
+    if spec is None or h * w * spec.bytes_per_pixel <= max_memory:
+        return kernel(arr, **params)
+    args = bind_params(kernel, params)
+    halo = spec.halo(args)
+    if halo is None:
+        return kernel(arr, **params)
+
+    budget_px = max(1, max_memory // spec.bytes_per_pixel)
+    align = max(1, spec.align(args))
+    if spec.mode == "tile":
+        side = max(MIN_TILE, math.isqrt(budget_px) - 2 * halo)
+        tile_h = tile_w = _round_down(side, align)
+    else:
+        tile_h = _round_down(max(1, budget_px // w - 2 * halo), align)
+        tile_w = w
+
+    extra = {}
+    if spec.prepare:
+        with span("prepare"):
+            extra = spec.prepare(arr, args, _round_down(max(MIN_TILE, tile_h), align))
+    call = {**params, **extra}
+
+    out = np.empty_like(arr)
+    if spec.mode == "rows":
+        for y in range(0, h, tile_h):
+            with span("tile"):
+                out[y : y + tile_h] = kernel(arr, rows=slice(y, y + tile_h), **call)
+        return out
+    for outer, inner in iter_tiles((h, w), tile_h, tile_w, halo):
+        with span("tile"):
+            out[outer][inner] = kernel(arr[outer], **call)[inner]
+    return out
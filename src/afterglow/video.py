@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional, Sequence
+
+from PIL import Image, ImageSequence, TiffImagePlugin
+
+from afterglow.batch import IMAGE_SUFFIXES
+from afterglow.filters.mapcache import configure_map_cache
+from afterglow.pipeline import StepSpec, build_steps, is_stateful, run_chain, with_state
+
+# output suffixes written as one multi-frame file; anything else is a directory
+ANIMATED_SUFFIXES = {".gif", ".png", ".apng", ".tif", ".tiff", ".webp"}
+
+# decoded frame bytes an APNG/WebP output may hold before writing gives up
+_MAX_HELD_BYTES = 2 << 30
+
+
+def _natural_key(path: Path) -> List[object]:
+    # frame2 sorts before frame10
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path.name)]
+
+
+def iter_frames(source: Path) -> Iterator[Image.Image]:
+    """Lazily decode frames from a multi-frame image or a directory of frames.
+
+    Directories are read in natural filename order. Each frame is an RGB
+    copy carrying the source frame's ``duration`` (ms) in ``info`` if known.
+    """
+    if source.is_dir():
+        paths = sorted(
+            (p for p in source.iterdir() if p.is_file() and p.suffix.lower() in IMAGE_SUFFIXES),
+            key=_natural_key,
+        )
+        for path in paths:
+            with Image.open(path) as image:
+                yield image.convert("RGB")
+        return
+
+    with Image.open(source) as image:
+        for frame in ImageSequence.Iterator(image):
+            out = frame.convert("RGB")
+            if "duration" in frame.info:
+                out.info["duration"] = frame.info["duration"]
+            yield out
+
+
+def _process_frame(frame: Image.Image, specs: Sequence[StepSpec], max_memory: Optional[int]) -> Image.Image:
+    out = run_chain(frame, build_steps(specs), max_memory=max_memory)
+    if "duration" in frame.info:
+        out.info["duration"] = frame.info["duration"]
+    return out
+
+
+def process_frames(
+    frames: Iterator[Image.Image],
+    specs: Sequence[StepSpec],
+    workers: Optional[int] = None,
+    prefetch: Optional[int] = None,
+    max_memory: Optional[int] = None,
+    map_cache: Optional[Path] = None,
+    warm_start: bool = True,
+) -> Iterator[Image.Image]:
+    """Run a chain over a frame stream on a process pool, yielding in order.
+
+    At most ``prefetch`` frames are decoded or in flight at once, so memory
+    stays bounded however long the sequence is. Chains with simulations
+    (flow paint, reaction-diffusion) carry them from frame to frame, which
+    runs the frames one after another in this process.
+
+    - specs: chain step specs, e.g. ``["kaleidoscope:slices=10", "glow"]``
+    - workers: pool size (defaults to the CPU count)
+    - prefetch: frames in flight (defaults to twice the pool size)
+    - max_memory: per-step working-set budget passed to each worker
+    - map_cache: directory where workers share cached coordinate maps
+    - warm_start: continue simulations from the previous frame instead of
+      restarting them (less flicker, far fewer steps per frame)
+    """
+    # fail fast on bad specs before spinning up workers
+    steps = with_state(build_steps(specs)) if warm_start else build_steps(specs)
+    if is_stateful(steps):
+        if map_cache is not None:
+            configure_map_cache(directory=map_cache)
+        for frame in frames:
+            out = run_chain(frame, steps, max_memory=max_memory)
+            if "duration" in frame.info:
+                out.info["duration"] = frame.info["duration"]
+            yield out
+        return
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        if map_cache is not None:
+            configure_map_cache(directory=map_cache)
+        for frame in frames:
+            yield _process_frame(frame, specs, max_memory)
+        return
+
+    prefetch = max(1, prefetch or 2 * workers)
+    init_args = (None, map_cache) if map_cache is not None else ()
+    initializer = configure_map_cache if map_cache is not None else None
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=init_args) as pool:
+        for frame in frames:
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+            pending.append(pool.submit(_process_frame, frame, list(specs), max_memory))
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_frames(
+    frames: Iterator[Image.Image],
+    output: Path,
+    duration: Optional[float] = None,
+    loop: int = 0,
+) -> int:
+    """Write a frame stream as it arrives; returns the number of frames.
+
+    Outputs with a suffix in :data:`ANIMATED_SUFFIXES` become one animated
+    file, anything else a directory of numbered PNGs. Directories and TIFF
+    are written frame by frame. Pillow's GIF encoder keeps its paletted
+    frames until the file is closed. Its APNG/WebP encoders need the whole
+    sequence before writing anything, so those raise ValueError once it
+    would hold more than 2 GiB of frames.
+
+    - duration: ms per frame; defaults to each frame's source duration
+    - loop: animation loop count (0 loops forever)
+    """
+    suffix = output.suffix.lower()
+    if suffix not in ANIMATED_SUFFIXES:
+        output.mkdir(parents=True, exist_ok=True)
+        count = 0
+        for count, frame in enumerate(frames, 1):
+            frame.save(output / f"frame_{count:05d}.png")
+        return count
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if suffix in {".tif", ".tiff"}:
+        count = 0
+        with TiffImagePlugin.AppendingTiffWriter(str(output), new=True) as tiff:
+            for count, frame in enumerate(frames, 1):
+                frame.save(tiff, format="TIFF")
+                tiff.newFrame()
+        return count
+
+    first = next(frames, None)
+    if first is None:
+        return 0
+    count = 1
+
+    def rest() -> Iterator[Image.Image]:
+        nonlocal count
+        for frame in frames:
+            count += 1
+            yield frame
+
+    append: Iterable[Image.Image] = rest() if suffix == ".gif" else _hold(first, rest(), suffix)
+    options = {"save_all": True, "append_images": append, "loop": loop}
+    if duration is not None:
+        options["duration"] = duration
+    elif suffix != ".gif":
+        # the WebP and APNG encoders read only the first frame's info, so
+        # pass every frame's duration (the GIF encoder reads each frame's)
+        durations = [frame.info.get("duration") for frame in [first, *append]]
+        known = [d for d in durations if d is not None]
+        if known:
+            options["duration"] = [known[0] if d is None else d for d in durations]
+    if suffix == ".apng":
+        options["format"] = "PNG"
+    first.save(output, **options)
+    return count
+
+
+def _hold(first: Image.Image, rest: Iterator[Image.Image], suffix: str) -> List[Image.Image]:
+    """The frames after ``first`` as a list, within :data:`_MAX_HELD_BYTES`."""
+    frames: List[Image.Image] = []
+    held = _frame_bytes(first)
+    for frame in rest:
+        held += _frame_bytes(frame)
+        if held > _MAX_HELD_BYTES:
+            raise ValueError(
+                f"{suffix} output holds every frame in memory and {len(frames) + 2} frames exceed "
+                f"{_MAX_HELD_BYTES >> 20} MB; write a directory of frames, .gif or .tif instead"
+            )
+        frames.append(frame)
+    return frames
+
+
+def _frame_bytes(frame: Image.Image) -> int:
+    return frame.width * frame.height * len(frame.getbands())